@@ -1,8 +1,7 @@
 """The roomba component."""
 import asyncio
 import logging
-
-from typing import Any
+import time
 
 import async_timeout
 from roombapy import RoombaConnectionError, RoombaFactory
@@ -15,17 +14,31 @@ from homeassistant.const import (
     CONF_PASSWORD,
     EVENT_HOMEASSISTANT_STOP,
 )
-from roombapy.mapping.roomba_map_device import RoombaMapDevice
-from roombapy.roomba import Roomba
-from roombapy.mapping import RoombaMap, DEFAULT_ICON_SIZE
 import voluptuous as vol
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.config_validation import ensure_list, positive_int, string
 from voluptuous.error import Invalid
 from voluptuous.validators import All, Range
 
+from .command_queue import RoombaCommandQueue
 from .const import *
+from .dirt_hotspots import DirtHotspots
+from .fleet import async_setup_fleet_services
+from .map_transform import async_setup_map_transforms
+from .mapping import initialize_mapping_config
+from .map_view import async_setup_map_view
+from .mission_events import MissionEvents
+from .mission_history import MissionHistory
+from .path_tracker import PathTracker
+from .profiler import async_setup_profiler_services
+from .region_catalog import REGION_TYPE_ROOM, RegionCatalog
+from .room_index import RoomTracker, build_room_indexes
+from .session import RoombaSessionManager
+from .state_monitor import RoombaStateMonitor
+from .websocket import async_setup_websocket
 
 _LOGGER = logging.getLogger(__name__) 
 
@@ -34,6 +47,9 @@ CONFIG_SCHEMA = vol.Schema(
         DOMAIN: vol.Schema(
             {
                 vol.Optional(CONF_NO_MAP_IMAGE): str,
+                vol.Optional(CONF_PASSWORD_WINDOW): vol.All(
+                    positive_int, Range(min=10, max=600)
+                ),
 
                 vol.Optional(CONF_DEVICES): vol.All(
                     ensure_list,
@@ -66,6 +82,27 @@ CONFIG_SCHEMA = vol.Schema(
                             vol.Optional(CONF_MAP_BG_COLOR): str,
                             vol.Optional(CONF_MAP_PATH_COLOR): str,
                             vol.Optional(CONF_MAP_PATH_WIDTH): str,
+                            vol.Optional(CONF_MAP_DIRT_OVERLAY, default=False): bool,
+                            vol.Optional(CONF_ROOMS): vol.All(
+                                ensure_list,
+                                [
+                                    {
+                                        vol.Required(CONF_REGION_ID): vol.Coerce(str),
+                                        vol.Optional(CONF_NAME): str,
+                                        vol.Optional(
+                                            CONF_REGION_TYPE, default=REGION_TYPE_ROOM
+                                        ): str,
+                                        vol.Required(CONF_ROOM_POINTS): vol.All(
+                                            [
+                                                vol.ExactSequence(
+                                                    [vol.Coerce(float), vol.Coerce(float)]
+                                                )
+                                            ],
+                                            vol.Length(min=3),
+                                        ),
+                                    }
+                                ],
+                            ),
                         }
                     ],
                 ),
@@ -100,6 +137,13 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
     # Make the config available for all other objects
     hass.data[DOMAIN] = {CONFIG: conf}
+    await async_setup_map_transforms(hass, conf)
+    hass.data[DOMAIN][ROOM_INDEXES] = build_room_indexes(conf.get(CONF_MAPS))
+
+    async_setup_fleet_services(hass)
+    async_setup_map_view(hass)
+    async_setup_profiler_services(hass)
+    async_setup_websocket(hass)
 
     return True    
 
@@ -116,21 +160,36 @@ async def async_setup_entry(hass, config_entry):
             },
         )
 
-    roomba = RoombaFactory.create_roomba(
-        address=config_entry.data[CONF_HOST],
-        blid=config_entry.data[CONF_BLID],
-        password=config_entry.data[CONF_PASSWORD],
-        continuous=config_entry.options[CONF_CONTINUOUS],
-        delay=config_entry.options[CONF_DELAY],
-    )
+    timings = {}
+    setup_started = time.perf_counter()
+
+    # Adaptive mode manages a continuous session itself
+    adaptive = config_entry.options.get(CONF_ADAPTIVE, DEFAULT_ADAPTIVE)
+    continuous = config_entry.options[CONF_CONTINUOUS] or adaptive
+
+    if roomba := async_adopt_session(hass, config_entry, continuous):
+        _LOGGER.debug("Using the session validated by the config flow")
+        roomba.delay = config_entry.options[CONF_DELAY]
+    else:
+        roomba = RoombaFactory.create_roomba(
+            address=config_entry.data[CONF_HOST],
+            blid=config_entry.data[CONF_BLID],
+            password=config_entry.data[CONF_PASSWORD],
+            continuous=continuous,
+            delay=config_entry.options[CONF_DELAY],
+        )
 
-    initialize_mapping_config(roomba, hass.data[DOMAIN][CONFIG])
+        try:
+            if not await async_connect_or_timeout(hass, roomba):
+                return False
+        except CannotConnect as err:
+            raise exceptions.ConfigEntryNotReady from err
+    timings[TIMING_CONNECT] = time.perf_counter() - setup_started
 
-    try:
-        if not await async_connect_or_timeout(hass, roomba):
-            return False
-    except CannotConnect as err:
-        raise exceptions.ConfigEntryNotReady from err
+    # Floorplans and icons are read from disk
+    await hass.async_add_executor_job(
+        initialize_mapping_config, roomba, hass.data[DOMAIN][CONFIG]
+    )
 
     async def _async_disconnect_roomba(event):
         await async_disconnect_or_timeout(hass, roomba)
@@ -139,16 +198,40 @@ async def async_setup_entry(hass, config_entry):
         EVENT_HOMEASSISTANT_STOP, _async_disconnect_roomba
     )
 
+    monitor = RoombaStateMonitor(hass, roomba)
+    session = RoombaSessionManager(hass, roomba, monitor)
+    session.async_set_adaptive(adaptive)
+    history = MissionHistory(hass, config_entry.data[CONF_BLID], monitor)
+    await history.async_load()
+    catalog = RegionCatalog(hass, config_entry.data[CONF_BLID], monitor)
+    await catalog.async_load()
+    hotspots = DirtHotspots(hass, roomba, config_entry.data[CONF_BLID], monitor)
+    await hotspots.async_load()
+
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][config_entry.entry_id] = {
         ROOMBA_SESSION: roomba,
         BLID: config_entry.data[CONF_BLID],
         CANCEL_STOP: cancel_stop,
+        STATE_MONITOR: monitor,
+        SESSION_MANAGER: session,
+        MISSION_HISTORY: history,
+        REGION_CATALOG: catalog,
+        MISSION_EVENTS: MissionEvents(hass, config_entry.data[CONF_BLID], monitor),
+        PATH_TRACKER: PathTracker(hass, config_entry.data[CONF_BLID], monitor),
+        ROOM_TRACKER: RoomTracker(
+            hass, roomba, config_entry.data[CONF_BLID], monitor, catalog
+        ),
+        DIRT_HOTSPOTS: hotspots,
+        COMMAND_QUEUE: RoombaCommandQueue(hass, roomba, monitor, session),
+        SETUP_TIMINGS: timings,
+        CONNECTION_DATA: _connection_data(config_entry),
     }
 
-
-
+    platforms_started = time.perf_counter()
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    timings[TIMING_PLATFORMS] = time.perf_counter() - platforms_started
+    timings[TIMING_TOTAL] = time.perf_counter() - setup_started
 
     if not config_entry.update_listeners:
         config_entry.add_update_listener(async_update_options)
@@ -189,9 +272,79 @@ async def async_disconnect_or_timeout(hass, roomba):
     return True
 
 
+@callback
+def async_park_session(hass, blid, roomba):
+    """Keep a validated session for the entry that is about to be set up.
+
+    It is disconnected unless async_setup_entry adopts it within
+    PARKED_SESSION_TIMEOUT seconds.
+    """
+    parked_sessions = hass.data.setdefault(PARKED_SESSIONS, {})
+    if previous := parked_sessions.pop(blid, None):
+        previous[1]()
+        hass.async_create_task(async_disconnect_or_timeout(hass, previous[0]))
+
+    async def _async_expire(_now):
+        if parked_sessions.get(blid, (None,))[0] is roomba:
+            del parked_sessions[blid]
+            await async_disconnect_or_timeout(hass, roomba)
+
+    parked_sessions[blid] = (
+        roomba,
+        async_call_later(hass, PARKED_SESSION_TIMEOUT, _async_expire),
+    )
+
+
+@callback
+def async_adopt_session(hass, config_entry, continuous):
+    """Return the session parked for this entry, if it can be reused."""
+    parked_sessions = hass.data.get(PARKED_SESSIONS, {})
+    if not (parked := parked_sessions.pop(config_entry.data[CONF_BLID], None)):
+        return None
+
+    roomba, cancel_expire = parked
+    cancel_expire()
+    if (
+        roomba.roomba_connected
+        and roomba.continuous == continuous
+        and roomba.remote_client.address == config_entry.data[CONF_HOST]
+        and roomba.remote_client.password == config_entry.data[CONF_PASSWORD]
+    ):
+        return roomba
+
+    hass.async_create_task(async_disconnect_or_timeout(hass, roomba))
+    return None
+
+
 async def async_update_options(hass, config_entry):
     """Update options."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    domain_data = hass.data[DOMAIN].get(config_entry.entry_id)
+    options = config_entry.options
+    # Adaptive mode manages a continuous session itself
+    continuous = options[CONF_CONTINUOUS] or options.get(CONF_ADAPTIVE, DEFAULT_ADAPTIVE)
+    if (
+        not domain_data
+        or domain_data[CONNECTION_DATA] != _connection_data(config_entry)
+        or domain_data[ROOMBA_SESSION].continuous != continuous
+    ):
+        # Host, credentials or connection mode changed, a new session is
+        # needed: the connection thread of a periodic session cannot be
+        # started twice
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+
+    domain_data[SESSION_MANAGER].async_apply_options(
+        options[CONF_DELAY],
+        options.get(CONF_ADAPTIVE, DEFAULT_ADAPTIVE),
+    )
+    async_dispatcher_send(
+        hass, SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id), options
+    )
+
+
+def _connection_data(config_entry):
+    """Return the entry data that requires a new session when changed."""
+    return {key: config_entry.data[key] for key in (CONF_HOST, CONF_BLID, CONF_PASSWORD)}
 
 
 async def async_unload_entry(hass, config_entry):
@@ -202,62 +355,20 @@ async def async_unload_entry(hass, config_entry):
     if unload_ok:
         domain_data = hass.data[DOMAIN][config_entry.entry_id]
         domain_data[CANCEL_STOP]()
+        await domain_data[COMMAND_QUEUE].async_shutdown()
+        await domain_data[SESSION_MANAGER].async_shutdown()
+        domain_data[MISSION_HISTORY].async_shutdown()
+        domain_data[REGION_CATALOG].async_shutdown()
+        domain_data[MISSION_EVENTS].async_shutdown()
+        domain_data[PATH_TRACKER].async_shutdown()
+        domain_data[ROOM_TRACKER].async_shutdown()
+        domain_data[DIRT_HOTSPOTS].async_shutdown()
+        domain_data[STATE_MONITOR].async_shutdown()
         await async_disconnect_or_timeout(hass, roomba=domain_data[ROOMBA_SESSION])
         hass.data[DOMAIN].pop(config_entry.entry_id)
 
     return unload_ok
 
-def initialize_mapping_config(roomba: Roomba, conf: dict[str,Any]):           
-    if CONF_ICONS in conf:
-        for conf_icon in conf[CONF_ICONS]:
-            s = DEFAULT_ICON_SIZE
-            if CONF_ICON_WIDTH in conf_icon and CONF_ICON_HEIGHT in conf_icon:
-                s = (conf_icon[CONF_ICON_WIDTH], conf_icon[CONF_ICON_HEIGHT])
-
-            roomba.add_map_icon_set(
-                conf_icon[CONF_NAME], 
-                conf_icon[CONF_ICON_BASE_PATH],
-                conf_icon.get(CONF_ICON_HOME,None),
-                conf_icon.get(CONF_ICON_ROOMBA,None),
-                conf_icon.get(CONF_ICON_ERROR,None),
-                conf_icon.get(CONF_ICON_CANCELLED,None),
-                conf_icon.get(CONF_ICON_BATTERY_LOW,None),
-                conf_icon.get(CONF_ICON_CHARGING,None),
-                conf_icon.get(CONF_ICON_BIN_FULL,None),
-                conf_icon.get(CONF_ICON_TANK_LOW,None),
-                s)
-
-    if CONF_DEVICES in conf:
-        for conf_dev in conf[CONF_DEVICES]:
-            device = RoombaMapDevice(
-                conf_dev[CONF_BLID],
-                conf_dev.get(CONF_MAP_ICON_SET,None),
-                conf_dev.get(CONF_MAP_PATH_COLOR,None),
-                conf_dev.get(CONF_MAP_PATH_WIDTH,None),
-                conf_dev.get(CONF_MAP_BG_COLOR,None)
-            )                
-
-            roomba.add_map_device(device) 
-
-    if CONF_MAPS in conf:
-        for conf_map in conf[CONF_MAPS]:
-            map = RoombaMap(conf_map[CONF_PMAP_ID], conf_map[CONF_NAME])
-            
-            if CONF_MAP_MIN_X in conf_map and CONF_MAP_MIN_Y in conf_map:
-                map.coords_start = (conf_map[CONF_MAP_MIN_X], conf_map[CONF_MAP_MIN_Y])
-            if CONF_MAP_MAX_X in conf_map and CONF_MAP_MAX_Y in conf_map:    
-                map.coords_end = (conf_map[CONF_MAP_MAX_X], conf_map[CONF_MAP_MAX_Y])
-
-            map.angle = conf_map.get(CONF_MAP_ANGLE,None)
-            map.floorplan = conf_map.get(CONF_MAP_FLOORPLAN_IMAGE,None)
-            map.walls = conf_map.get(CONF_MAP_WALLS_IMAGE,None)
-            map.icon_set = conf_map.get(CONF_MAP_ICON_SET,None)
-            map.bg_color = conf_map.get(CONF_MAP_BG_COLOR,None)
-            map.path_color = conf_map.get(CONF_MAP_PATH_COLOR,None)
-            map.path_width = conf_map.get(CONF_MAP_PATH_WIDTH,None)
-
-            roomba.add_map_definition(map)
-
 def roomba_reported_state(roomba):
     """Roomba report."""
     return roomba.master_state.get("state", {}).get("reported", {})
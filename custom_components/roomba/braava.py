@@ -29,9 +29,9 @@ SUPPORT_BRAAVA = SUPPORT_IROBOT | SUPPORT_FAN_SPEED
 class BraavaJet(IRobotVacuum):
     """Braava Jet."""
 
-    def __init__(self, roomba, blid):
+    def __init__(self, roomba, blid, command_queue, catalog):
         """Initialize the Roomba handler."""
-        super().__init__(roomba, blid)
+        super().__init__(roomba, blid, command_queue, catalog)
 
         # Initialize fan speed list
         speed_list = []
@@ -106,13 +106,11 @@ class BraavaJet(IRobotVacuum):
             overlap = OVERLAP_DEEP
         else:
             overlap = OVERLAP_EXTENDED
-        await self.hass.async_add_executor_job(
-            self.vacuum.set_preference, "rankOverlap", overlap
-        )
-        await self.hass.async_add_executor_job(
-            self.vacuum.set_preference,
-            "padWetness",
-            {"disposable": spray, "reusable": spray},
+        await self._command_queue.async_set_preferences(
+            {
+                "rankOverlap": overlap,
+                "padWetness": {"disposable": spray, "reusable": spray},
+            }
         )
 
     @property
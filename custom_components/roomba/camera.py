@@ -1,17 +1,28 @@
 """Sensor for checking the battery level of Roomba."""
-from homeassistant.components.camera import Camera
+from aiohttp import hdrs, web
+from homeassistant.components.camera import DOMAIN as CAMERA_DOMAIN, Camera, CameraImageView
 from roombapy import Roomba
 from roombapy.const import ROOMBA_STATES
 
 from . import roomba_reported_state
-from .const import BLID, DOMAIN, ROOMBA_SESSION
+from .const import BLID, CAMERA_VIEW, DIRT_HOTSPOTS, DOMAIN, PATH_TRACKER, ROOMBA_SESSION
+from .dirt_hotspots import DirtHotspots, draw_overlay, overlay_enabled
 from .irobot_base import IRobotEntity
+from .map_transform import get_map_transform
+from .map_view import etag_matches, not_modified
+from .path_tracker import PathTracker
+
+ATTR_MAP_CURRENT_PMAP = "map_current_id"
+ATTR_MAP_MIN_COORDS = "map_min_coords"
+ATTR_MAP_MAX_COORDS = "map_max_coords"
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the iRobot Roomba vacuum cleaner."""
     domain_data = hass.data[DOMAIN][config_entry.entry_id]
     roomba = domain_data[ROOMBA_SESSION]
     blid = domain_data[BLID]
+    tracker = domain_data[PATH_TRACKER]
+    hotspots = domain_data[DIRT_HOTSPOTS]
 
     entities = []
 
@@ -19,16 +30,48 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     capabilities = state.get("cap", {})
     cap_position = capabilities.get("pose", 0) == 1
     if cap_position:
-      entities.append(RoombaCamera(roomba, blid))
+      entities.append(RoombaCamera(roomba, blid, tracker, hotspots))
+
+    if entities and not hass.data[DOMAIN].get(CAMERA_VIEW):
+        hass.http.register_view(RoombaCameraImageView(hass.data[CAMERA_DOMAIN]))
+        hass.data[DOMAIN][CAMERA_VIEW] = True
 
     async_add_entities(entities, True)
 
+class RoombaCameraImageView(CameraImageView):
+    """Camera proxy answering conditional requests for Roomba maps.
+
+    The map only changes with the path, the state and the flags of the
+    robot, so clients polling a docked robot get a 304 without a body.
+    """
+
+    url = "/api/roomba/camera_proxy/{entity_id}"
+    name = "api:roomba:camera_image"
+
+    async def handle(self, request: web.Request, camera: Camera) -> web.StreamResponse:
+        """Return the image, or 304 if the client has the current version."""
+        if not isinstance(camera, RoombaCamera):
+            return await super().handle(request, camera)
+        etag = f'"{camera.content_version}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = await super().handle(request, camera)
+        response.headers[hdrs.ETAG] = etag
+        response.headers[hdrs.CACHE_CONTROL] = "no-cache"
+        return response
+
 class RoombaCamera(IRobotEntity, Camera):
     """Class to hold Roomba Camera (i.e. map)"""
-    def __init__(self, roomba: Roomba, blid):
+    def __init__(
+        self, roomba: Roomba, blid, tracker: PathTracker, hotspots: DirtHotspots
+    ):
         IRobotEntity.__init__(self, roomba, blid)
         Camera.__init__(self)
         self.content_type = "image/png"
+        self._tracker = tracker
+        self._hotspots = hotspots
+        self._image_key = None
+        self._image = None
 
     @property
     def name(self):
@@ -47,8 +90,60 @@ class RoombaCamera(IRobotEntity, Camera):
         """Return the ID of this sensor."""
         return f"map_{self._blid}"     
    
-    def camera_image(self, width: int = None, height: int = None) -> bytes:
-        return self.vacuum.get_map(width,height)
+    @property
+    def entity_picture(self):
+        """Return the conditional proxy as the picture of the camera."""
+        return f"/api/roomba/camera_proxy/{self.entity_id}?token={self.access_tokens[-1]}"
+
+    @property
+    def content_version(self):
+        """Return a version that changes whenever the image may change."""
+        flags = ",".join(sorted(flag for flag, on in self.vacuum.flags.items() if on))
+        version = (
+            f"{self._tracker.version}-{self.vacuum.current_pmap_id}"
+            f"-{self.vacuum.current_state}-{flags}"
+        )
+        if overlay_enabled(self.hass, self.vacuum.current_pmap_id):
+            version = f"{version}-{self._hotspots.version}"
+        return version
+
+    @property
+    def extra_state_attributes(self):
+        """Return the map the image is drawn on."""
+        min_c = self.vacuum.map_min_coords
+        max_c = self.vacuum.map_max_coords
+        return {
+            ATTR_MAP_CURRENT_PMAP: self.vacuum.current_pmap_id,
+            ATTR_MAP_MIN_COORDS: f"({min_c[0]},{min_c[1]})",
+            ATTR_MAP_MAX_COORDS: f"({max_c[0]},{max_c[1]})",
+        }
+
+    async def async_camera_image(self, width: int = None, height: int = None) -> bytes:
+        # Encoding the PNG is the expensive part, reuse it until the map changes
+        key = (self.content_version, width, height)
+        if key == self._image_key and self._image is not None:
+            return self._image
+
+        pmap_id = self.vacuum.current_pmap_id
+        cells = None
+        if overlay_enabled(self.hass, pmap_id):
+            cells = self._hotspots.cells(pmap_id)
+        self._image = await self.hass.async_add_executor_job(
+            self._render, width, height, cells, get_map_transform(self.hass, pmap_id)
+        )
+        self._image_key = key
+        return self._image
+
+    def _render(self, width, height, cells, transform):
+        """Return the map image, with the dirt hotspots if there are any."""
+        if not cells:
+            return self.vacuum.get_map(width,height)
+        # The hotspots are placed on the map at the size it is drawn at
+        image = self.vacuum.get_map()
+        if image:
+            size = (width, height) if width and height else None
+            image = draw_overlay(image, cells, transform, size)
+        return image
 
     def _get_state_text(self):
         state_text = ""
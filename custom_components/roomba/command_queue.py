@@ -0,0 +1,238 @@
+"""Per-robot command queue for iRobot devices."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+import time
+from typing import Any
+
+from roombapy import Roomba
+
+from homeassistant.core import HomeAssistant, callback
+
+from .latency import (
+    STAGE_PUBLISH,
+    STAGE_QUEUE,
+    STAGE_ROBOT,
+    STAGE_TOTAL,
+    CommandLatency,
+)
+from .session import RoombaSessionManager
+from .state_monitor import RoombaStateMonitor, StatePredicate
+
+_LOGGER = logging.getLogger(__name__)
+
+ACK_TIMEOUT = 10
+
+# Commands that change the mission state. Only the latest one that has not
+# been sent yet is kept, older ones are superseded by it.
+MISSION_COMMANDS = ("start", "resume", "pause", "stop", "dock")
+
+# Phases that show a mission command took effect, in case the robot reports
+# the new phase before lastCommand. Other commands, like find, never show up
+# in the reported state and resolve as soon as they are published.
+COMMAND_PHASES = {
+    "start": ("new", "run"),
+    "resume": ("run",),
+    "pause": ("pause", "stop"),
+    "stop": ("stop",),
+    "dock": ("hmUsrDock", "charge"),
+}
+
+# Latency label of merged preference writes
+PREFERENCES = "preferences"
+
+
+@dataclass
+class _PendingCommand:
+    """A command waiting to be sent to the robot."""
+
+    command: str
+    params: dict[str, Any] | None
+    future: asyncio.Future
+    queued: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _PendingPreferences:
+    """Preference writes merged into a single delta."""
+
+    values: dict[str, Any] = field(default_factory=dict)
+    future: asyncio.Future | None = None
+    queued: float = 0.0
+
+
+class RoombaCommandQueue:
+    """Serialize, coalesce and acknowledge commands sent to one robot.
+
+    Preference writes that are queued before the robot is contacted are merged
+    into one delta message, mission commands that have not been sent yet are
+    replaced by newer ones. Preferences and mission commands resolve once the
+    reported state of the robot reflects the change, or after ACK_TIMEOUT
+    seconds, other commands once published. How long each stage took is
+    recorded in latency histograms per command.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        roomba: Roomba,
+        monitor: RoombaStateMonitor,
+        session: RoombaSessionManager,
+    ):
+        """Initialize the command queue."""
+        self.hass = hass
+        self.roomba = roomba
+        self.monitor = monitor
+        self.session = session
+        self._commands: list[_PendingCommand] = []
+        self._preferences = _PendingPreferences()
+        self._worker: asyncio.Task | None = None
+        self.latency = CommandLatency()
+
+    async def async_send_command(self, command: str, params=None) -> bool:
+        """Queue a command and wait until the robot acknowledges it."""
+        future = self.hass.loop.create_future()
+        if command in MISSION_COMMANDS:
+            for pending in [p for p in self._commands if p.command in MISSION_COMMANDS]:
+                _LOGGER.debug("Command %s superseded by %s", pending.command, command)
+                self._commands.remove(pending)
+                _chain_future(future, pending.future)
+        self._commands.append(_PendingCommand(command, params, future))
+        self._async_schedule_worker()
+        return await asyncio.shield(future)
+
+    async def async_set_preferences(self, preferences: dict[str, Any]) -> bool:
+        """Queue preference writes and wait until the robot reports them."""
+        pending = self._preferences
+        if pending.future is None:
+            pending.future = self.hass.loop.create_future()
+            pending.queued = time.monotonic()
+        pending.values.update(preferences)
+        self._async_schedule_worker()
+        return await asyncio.shield(pending.future)
+
+    async def async_shutdown(self):
+        """Stop the worker and release everyone still waiting."""
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+        for pending in self._commands:
+            _resolve(pending.future, False)
+        self._commands.clear()
+        if self._preferences.future:
+            _resolve(self._preferences.future, False)
+        self._preferences = _PendingPreferences()
+
+    @callback
+    def _async_schedule_worker(self):
+        """Start the worker unless it is already running."""
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_task(self._async_process())
+
+    async def _async_process(self):
+        """Send everything that is queued, one message at a time."""
+        await self.session.async_ensure_connected()
+        while self._preferences.values or self._commands:
+            if self._preferences.values:
+                pending = self._preferences
+                self._preferences = _PendingPreferences()
+                label = PREFERENCES
+                publish = self._async_publish_preferences(pending.values)
+            else:
+                pending = self._commands.pop(0)
+                label = pending.command
+                publish = self._async_publish_command(pending.command, pending.params)
+            publish_started = time.monotonic()
+            try:
+                predicate = await publish
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error sending to the robot")
+                _resolve(pending.future, False)
+                continue
+            published = time.monotonic()
+            self.latency.record(label, STAGE_QUEUE, publish_started - pending.queued)
+            self.latency.record(label, STAGE_PUBLISH, published - publish_started)
+            if predicate is None:
+                _resolve(pending.future, True)
+                continue
+            self.hass.async_create_task(
+                self._async_wait_ack(predicate, pending, label, published)
+            )
+
+    async def _async_publish_preferences(self, values: dict[str, Any]):
+        """Send the merged preferences as a single delta."""
+        _LOGGER.debug("Set preferences: %s", values)
+        payload = json.dumps({"state": values})
+        await self.hass.async_add_executor_job(
+            self.roomba.remote_client.publish, "delta", payload
+        )
+
+        def _applied(state: dict) -> bool:
+            return all(state.get(key) == value for key, value in values.items())
+
+        return _applied
+
+    async def _async_publish_command(
+        self, command: str, params
+    ) -> StatePredicate | None:
+        """Send a command to the robot, return how to recognize it took effect.
+
+        Returns None for commands the reported state does not reflect.
+        """
+        _LOGGER.debug("Send command: %s (%s)", command, params)
+        state = self.monitor.reported_state
+        previous_command = dict(state.get("lastCommand") or {})
+        phase = state.get("cleanMissionStatus", {}).get("phase")
+        await self.hass.async_add_executor_job(
+            self.roomba.send_command, command, params
+        )
+        if command not in COMMAND_PHASES:
+            return None
+
+        def _applied(state: dict) -> bool:
+            # The robot stamps lastCommand with its own clock, so a new report
+            # of the command is detected by comparing it to the previous one
+            last_command = state.get("lastCommand") or {}
+            if (
+                last_command.get("command") == command
+                and last_command != previous_command
+            ):
+                return True
+            new_phase = state.get("cleanMissionStatus", {}).get("phase")
+            return new_phase != phase and new_phase in COMMAND_PHASES[command]
+
+        return _applied
+
+    async def _async_wait_ack(
+        self,
+        predicate: StatePredicate,
+        pending: _PendingCommand | _PendingPreferences,
+        label: str,
+        published: float,
+    ):
+        """Wait for the acknowledgement and resolve the caller."""
+        acknowledged = await self.monitor.async_wait_for_state(predicate, ACK_TIMEOUT)
+        if acknowledged:
+            now = time.monotonic()
+            self.latency.record(label, STAGE_ROBOT, now - published)
+            self.latency.record(label, STAGE_TOTAL, now - pending.queued)
+        else:
+            _LOGGER.debug("Robot did not acknowledge the change in time")
+            self.latency.record_timeout(label)
+        _resolve(pending.future, acknowledged)
+
+
+def _resolve(future: asyncio.Future, result):
+    """Set the result of a future unless it is already done."""
+    if not future.done():
+        future.set_result(result)
+
+
+def _chain_future(source: asyncio.Future, target: asyncio.Future):
+    """Resolve target with the result of source."""
+    source.add_done_callback(
+        lambda fut: _resolve(target, False if fut.cancelled() else fut.result())
+    )
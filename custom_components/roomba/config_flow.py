@@ -1,10 +1,9 @@
 """Config flow to configure roomba component."""
 
 import asyncio
+import logging
 
 from roombapy import RoombaFactory
-from roombapy.discovery import RoombaDiscovery
-from roombapy.getpassword import RoombaPassword
 import voluptuous as vol
 
 from homeassistant import config_entries, core
@@ -12,24 +11,31 @@ from homeassistant.components.dhcp import HOSTNAME, IP_ADDRESS
 from homeassistant.const import CONF_DELAY, CONF_HOST, CONF_NAME, CONF_PASSWORD
 from homeassistant.core import callback
 
-from . import CannotConnect, async_connect_or_timeout, async_disconnect_or_timeout
+from . import CannotConnect, async_connect_or_timeout, async_park_session
 from .const import (
+    CONF_ADAPTIVE,
     CONF_BLID,
     CONF_CONTINUOUS,
+    CONF_PASSWORD_WINDOW,
+    CONF_POSITION_INTERVAL,
+    CONFIG,
+    DEFAULT_ADAPTIVE,
     DEFAULT_CONTINUOUS,
     DEFAULT_DELAY,
+    DEFAULT_POSITION_INTERVAL,
     DOMAIN,
     ROOMBA_SESSION,
 )
+from .credentials import DEFAULT_PASSWORD_WINDOW, async_retrieve_password
+from .discovery import async_get_discovery_cache, parse_hosts
 
-ROOMBA_DISCOVERY_LOCK = "roomba_discovery_lock"
-ALL_ATTEMPTS = 2
-HOST_ATTEMPTS = 6
-ROOMBA_WAKE_TIME = 6
+_LOGGER = logging.getLogger(__name__)
 
-DEFAULT_OPTIONS = {CONF_CONTINUOUS: DEFAULT_CONTINUOUS, CONF_DELAY: DEFAULT_DELAY}
+# Seconds to wait for answers to a broadcast, or for a given host to answer
+ALL_DISCOVERY_TIMEOUT = 8
+HOST_DISCOVERY_TIMEOUT = 15
 
-MAX_NUM_DEVICES_TO_DISCOVER = 25
+DEFAULT_OPTIONS = {CONF_CONTINUOUS: DEFAULT_CONTINUOUS, CONF_DELAY: DEFAULT_DELAY}
 
 AUTH_HELP_URL_KEY = "auth_help_url"
 AUTH_HELP_URL_VALUE = "https://www.home-assistant.io/integrations/roomba/#manually-retrieving-your-credentials"
@@ -39,18 +45,19 @@ async def validate_input(hass: core.HomeAssistant, data):
     """Validate the user input allows us to connect.
 
     Data has the keys from DATA_SCHEMA with values provided by the user.
+    The session is handed over to the config entry set up right after.
     """
     roomba = RoombaFactory.create_roomba(
         address=data[CONF_HOST],
         blid=data[CONF_BLID],
         password=data[CONF_PASSWORD],
-        continuous=False,
+        continuous=data[CONF_CONTINUOUS],
         delay=data[CONF_DELAY],
     )
 
     info = await async_connect_or_timeout(hass, roomba)
     if info:
-        await async_disconnect_or_timeout(hass, roomba)
+        async_park_session(hass, data[CONF_BLID], roomba)
 
     return {
         ROOMBA_SESSION: info[ROOMBA_SESSION],
@@ -70,6 +77,10 @@ class RoombaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.name = None
         self.blid = None
         self.host = None
+        self.probe_hosts = []
+        self.probe_task = None
+        self.password = None
+        self.password_task = None
 
     @staticmethod
     @callback
@@ -86,6 +97,9 @@ class RoombaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         self.host = discovery_info[IP_ADDRESS]
         self.blid = _async_blid_from_hostname(discovery_info[HOSTNAME])
+        async_get_discovery_cache(self.hass).async_update_from_dhcp(
+            self.blid, self.host
+        )
         await self.async_set_unique_id(self.blid)
         self._abort_if_unique_id_configured(updates={CONF_HOST: self.host})
 
@@ -179,9 +193,27 @@ class RoombaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ),
             )
 
-        self._async_abort_entries_match({CONF_HOST: user_input["host"]})
+        try:
+            hosts = parse_hosts(user_input[CONF_HOST])
+        except ValueError:
+            hosts = []
+        if not hosts:
+            return self.async_show_form(
+                step_id="manual",
+                description_placeholders={AUTH_HELP_URL_KEY: AUTH_HELP_URL_VALUE},
+                data_schema=vol.Schema(
+                    {vol.Required(CONF_HOST, default=user_input[CONF_HOST]): str}
+                ),
+                errors={CONF_HOST: "invalid_host"},
+            )
 
-        self.host = user_input[CONF_HOST]
+        if len(hosts) > 1:
+            self.probe_hosts = hosts
+            return await self.async_step_probe()
+
+        self._async_abort_entries_match({CONF_HOST: hosts[0]})
+
+        self.host = hosts[0]
 
         devices = await _async_discover_roombas(self.hass, self.host)
         if not devices:
@@ -193,32 +225,130 @@ class RoombaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._abort_if_unique_id_configured()
         return await self.async_step_link()
 
+    async def async_step_probe(self, user_input=None):
+        """Probe a list of hosts concurrently."""
+        if not self.probe_task:
+            self.discovered_robots = {}
+            self.probe_task = self.hass.async_create_task(self._async_probe_hosts())
+        if not self.probe_task.done():
+            return self.async_show_progress(
+                step_id="probe",
+                progress_action="probe",
+                description_placeholders={"count": len(self.probe_hosts)},
+            )
+
+        self.probe_task = None
+        if not self.discovered_robots:
+            return self.async_show_progress_done(next_step_id="probe_failed")
+        return self.async_show_progress_done(next_step_id="select")
+
+    async def _async_probe_hosts(self):
+        """Collect the robots among the hosts as they answer."""
+        already_configured = self._async_current_ids(False)
+        cache = async_get_discovery_cache(self.hass)
+        cancelled = False
+        try:
+            async for device in cache.async_probe_hosts(self.probe_hosts):
+                if device.blid not in already_configured:
+                    self.discovered_robots[device.ip] = device
+        except asyncio.CancelledError:
+            # The flow was aborted or removed, there is nothing to resume
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self._async_resume_flow()
+
+    async def async_step_probe_failed(self, user_input=None):
+        """Abort when none of the hosts answered."""
+        return self.async_abort(reason="cannot_connect")
+
+    async def async_step_select(self, user_input=None):
+        """Select one of the probed robots."""
+        if user_input is not None:
+            self.host = user_input[CONF_HOST]
+            return await self._async_start_link()
+
+        return self.async_show_form(
+            step_id="select",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST): vol.In(
+                        {
+                            device.ip: f"{device.robot_name} ({device.ip})"
+                            for device in self.discovered_robots.values()
+                        }
+                    )
+                }
+            ),
+        )
+
+    async def async_remove(self):
+        """Stop probing and password retrieval when the flow is aborted."""
+        for task in (self.probe_task, self.password_task):
+            if task:
+                task.cancel()
+
     async def async_step_link(self, user_input=None):
         """Attempt to link with the Roomba.
 
         Given a configured host, will ask the user to press the home and target buttons
         to connect to the device.
         """
-        if user_input is None:
-            return self.async_show_form(
+        if not self.password_task:
+            if user_input is None:
+                return self.async_show_form(
+                    step_id="link",
+                    description_placeholders={CONF_NAME: self.name or self.blid},
+                )
+
+            window = (
+                self.hass.data.get(DOMAIN, {})
+                .get(CONFIG, {})
+                .get(CONF_PASSWORD_WINDOW, DEFAULT_PASSWORD_WINDOW)
+            )
+            self.password_task = self.hass.async_create_task(
+                self._async_retrieve_password(window)
+            )
+        if not self.password_task.done():
+            return self.async_show_progress(
                 step_id="link",
+                progress_action="retrieve_password",
                 description_placeholders={CONF_NAME: self.name or self.blid},
             )
 
-        roomba_pw = RoombaPassword(self.host)
+        self.password = self.password_task.result()
+        self.password_task = None
+        if not self.password:
+            return self.async_show_progress_done(next_step_id="link_manual")
+        return self.async_show_progress_done(next_step_id="link_finish")
 
+    async def _async_retrieve_password(self, window):
+        """Ask the robot for its password while the user presses the button."""
+        cancelled = False
         try:
-            password = await self.hass.async_add_executor_job(roomba_pw.get_password)
-        except OSError:
-            return await self.async_step_link_manual()
+            return await async_retrieve_password(self.host, window)
+        except asyncio.CancelledError:
+            # The flow was aborted or removed, there is nothing to resume
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self._async_resume_flow()
 
-        if not password:
-            return await self.async_step_link_manual()
+    @callback
+    def _async_resume_flow(self):
+        """Continue the flow once its background task is done."""
+        self.hass.async_create_task(
+            self.hass.config_entries.flow.async_configure(flow_id=self.flow_id)
+        )
 
+    async def async_step_link_finish(self, user_input=None):
+        """Create the entry with the retrieved password."""
         config = {
             CONF_HOST: self.host,
             CONF_BLID: self.blid,
-            CONF_PASSWORD: password,
+            CONF_PASSWORD: self.password,
             **DEFAULT_OPTIONS,
         }
 
@@ -287,19 +417,23 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_DELAY, DEFAULT_DELAY
                         ),
                     ): int,
+                    vol.Optional(
+                        CONF_ADAPTIVE,
+                        default=self.config_entry.options.get(
+                            CONF_ADAPTIVE, DEFAULT_ADAPTIVE
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_POSITION_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_POSITION_INTERVAL, DEFAULT_POSITION_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
                 }
             ),
         )
 
 
-@callback
-def _async_get_roomba_discovery():
-    """Create a discovery object."""
-    discovery = RoombaDiscovery()
-    discovery.amount_of_broadcasted_messages = MAX_NUM_DEVICES_TO_DISCOVER
-    return discovery
-
-
 @callback
 def _async_blid_from_hostname(hostname):
     """Extract the blid from the hostname."""
@@ -307,36 +441,14 @@ def _async_blid_from_hostname(hostname):
 
 
 async def _async_discover_roombas(hass, host):
-    discovered_hosts = set()
-    devices = []
-    discover_lock = hass.data.setdefault(ROOMBA_DISCOVERY_LOCK, asyncio.Lock())
-    discover_attempts = HOST_ATTEMPTS if host else ALL_ATTEMPTS
-
-    for attempt in range(discover_attempts + 1):
-        async with discover_lock:
-            discovery = _async_get_roomba_discovery()
-            try:
-                if host:
-                    device = await hass.async_add_executor_job(discovery.get, host)
-                    discovered = [device] if device else []
-                else:
-                    discovered = await hass.async_add_executor_job(discovery.get_all)
-            except OSError:
-                # Socket temporarily unavailable
-                await asyncio.sleep(ROOMBA_WAKE_TIME * attempt)
-                continue
-            else:
-                for device in discovered:
-                    if device.ip in discovered_hosts:
-                        continue
-                    discovered_hosts.add(device.ip)
-                    devices.append(device)
-            finally:
-                discovery.server_socket.close()
-
-        if host and host in discovered_hosts:
-            return devices
-
-        await asyncio.sleep(ROOMBA_WAKE_TIME)
-
-    return devices
+    """Discover robots, returning as soon as host answers if one is given."""
+    cache = async_get_discovery_cache(hass)
+
+    try:
+        if host:
+            return await cache.async_discover_host(host, HOST_DISCOVERY_TIMEOUT)
+        return await cache.async_discover_all(ALL_DISCOVERY_TIMEOUT)
+    except OSError as err:
+        # Socket temporarily unavailable
+        _LOGGER.debug("Discovery failed: %s", err)
+        return []
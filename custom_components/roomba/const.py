@@ -3,18 +3,53 @@ from homeassistant.const import CONF_PATH
 
 DOMAIN = "roomba"
 CONFIG = "config"
-PLATFORMS = ["sensor", "binary_sensor", "vacuum", "camera"]
+PLATFORMS = ["sensor", "binary_sensor", "vacuum", "camera", "select"]
 CONF_CERT = "certificate"
 CONF_CONTINUOUS = "continuous"
+CONF_ADAPTIVE = "adaptive"
+CONF_POSITION_INTERVAL = "position_interval"
 CONF_BLID = "blid"
 DEFAULT_CERT = "/etc/ssl/certs/ca-certificates.crt"
 DEFAULT_CONTINUOUS = True
+DEFAULT_ADAPTIVE = False
+DEFAULT_POSITION_INTERVAL = 10
 DEFAULT_DELAY = 1
 ROOMBA_SESSION = "roomba_session"
 BLID = "blid_key"
 CANCEL_STOP = "cancel_stop"
+COMMAND_QUEUE = "command_queue"
+STATE_MONITOR = "state_monitor"
+SESSION_MANAGER = "session_manager"
+MISSION_HISTORY = "mission_history"
+REGION_CATALOG = "region_catalog"
+MISSION_EVENTS = "mission_events"
+PATH_TRACKER = "path_tracker"
+CAMERA_VIEW = "camera_view"
+MAP_TRANSFORMS = "map_transforms"
+ROOM_INDEXES = "room_indexes"
+ROOM_TRACKER = "room_tracker"
+DIRT_HOTSPOTS = "dirt_hotspots"
+VACUUM_ENTITY = "vacuum_entity"
+SETUP_TIMINGS = "setup_timings"
+CONNECTION_DATA = "connection_data"
+
+SIGNAL_OPTIONS_UPDATED = "roomba_options_updated_{}"
+
+# Sessions validated by a config flow, waiting to be adopted by the entry
+PARKED_SESSIONS = "roomba_parked_sessions"
+PARKED_SESSION_TIMEOUT = 60
+
+TIMING_CONNECT = "connect"
+TIMING_PLATFORMS = "platforms"
+TIMING_TOTAL = "total"
 
 SERVICE_CLEAN_ROOMS = "clean_rooms"
+SERVICE_NAME_MAP = "name_map"
+SERVICE_NAME_REGION = "name_region"
+SERVICE_FLEET_CLEAN_ROOMS = "fleet_clean_rooms"
+SERVICE_ENQUEUE_JOB = "enqueue_job"
+SERVICE_CLEAR_JOBS = "clear_jobs"
+SERVICE_PROFILE = "profile"
 
 #yaml-based config
 CONF_MAPS = "maps"
@@ -30,7 +65,13 @@ CONF_MAP_WALLS_IMAGE = "walls_image"
 CONF_MAP_BG_COLOR = "bg_color"
 CONF_MAP_PATH_COLOR = "path_color"
 CONF_MAP_PATH_WIDTH = "path_width"
+CONF_MAP_DIRT_OVERLAY = "dirt_overlay"
+CONF_ROOMS = "rooms"
+CONF_REGION_ID = "region_id"
+CONF_REGION_TYPE = "type"
+CONF_ROOM_POINTS = "points"
 CONF_NO_MAP_IMAGE = "no_map_image"
+CONF_PASSWORD_WINDOW = "password_window"
 
 CONF_ICONS = "icons"
 CONF_ICON_BASE_PATH = "base_path"
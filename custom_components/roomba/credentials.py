@@ -0,0 +1,80 @@
+"""Retrieve the password of an iRobot device."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+import logging
+import ssl
+
+_LOGGER = logging.getLogger(__name__)
+
+PASSWORD_PORT = 8883
+PASSWORD_REQUEST = bytes.fromhex("f005efcc3b2900")
+# The answer echoes the request after the 2 byte header, the password follows
+PASSWORD_OFFSET = 5
+
+DEFAULT_PASSWORD_WINDOW = 60
+PASSWORD_RETRY_INTERVAL = 2
+ATTEMPT_TIMEOUT = 5
+
+
+def _tls_context() -> ssl.SSLContext:
+    """Return a context accepting the self-signed certificate of the robot."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        # Older robots only offer ciphers below the default security level
+        context.set_ciphers("DEFAULT@SECLEVEL=1")
+    except ssl.SSLError:
+        pass
+    return context
+
+
+async def async_request_password(host: str, context: ssl.SSLContext) -> str | None:
+    """Ask the robot for its password once.
+
+    Returns None unless the robot is in pairing mode.
+    """
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, PASSWORD_PORT, ssl=context), ATTEMPT_TIMEOUT
+        )
+        writer.write(PASSWORD_REQUEST)
+        await writer.drain()
+        header = await asyncio.wait_for(reader.readexactly(2), ATTEMPT_TIMEOUT)
+        payload = await asyncio.wait_for(
+            reader.readexactly(header[1]), ATTEMPT_TIMEOUT
+        )
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as err:
+        _LOGGER.debug("No password from %s: %s", host, err)
+        return None
+    finally:
+        if writer:
+            writer.close()
+            with suppress(OSError):
+                await writer.wait_closed()
+
+    if len(payload) <= PASSWORD_OFFSET:
+        return None
+    return payload[PASSWORD_OFFSET:].decode(errors="ignore").rstrip("\x00") or None
+
+
+async def async_retrieve_password(
+    host: str, window: float = DEFAULT_PASSWORD_WINDOW
+) -> str | None:
+    """Ask the robot for its password until it answers or window expires.
+
+    The user presses the home button on the robot in the meantime. Cancelling
+    the returned coroutine stops the attempts, no threads are involved.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + window
+    context = _tls_context()
+    while True:
+        if password := await async_request_password(host, context):
+            return password
+        if loop.time() + PASSWORD_RETRY_INTERVAL > deadline:
+            return None
+        await asyncio.sleep(PASSWORD_RETRY_INTERVAL)
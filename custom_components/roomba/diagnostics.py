@@ -0,0 +1,39 @@
+"""Diagnostics support for iRobot devices."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from . import roomba_reported_state
+from .const import COMMAND_QUEUE, DOMAIN, ROOMBA_SESSION, SETUP_TIMINGS
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    "mac",
+    "wlan0HwAddr",
+    "bssid",
+    "ssid",
+    "addr",
+    "gw",
+    "dns1",
+    "dns2",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    roomba = domain_data[ROOMBA_SESSION]
+
+    return {
+        "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "setup_timings": domain_data[SETUP_TIMINGS],
+        "command_latency": domain_data[COMMAND_QUEUE].latency.as_dict(),
+        "reported_state": async_redact_data(roomba_reported_state(roomba), TO_REDACT),
+    }
@@ -0,0 +1,201 @@
+"""Where the robot detects dirt, as a decaying grid per map."""
+from __future__ import annotations
+
+from collections import defaultdict
+import io
+import math
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from roombapy import Roomba
+
+from .const import (
+    CONF_MAP_DIRT_OVERLAY,
+    CONF_MAPS,
+    CONF_PMAP_ID,
+    CONFIG,
+    DOMAIN,
+    ROOM_INDEXES,
+)
+from .map_transform import MapTransform
+from .mission_history import IDLE_CYCLES
+from .room_index import Room
+from .state_monitor import RoombaStateMonitor
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+
+SIGNAL_HOTSPOTS_UPDATED = "roomba_hotspots_updated_{}"
+
+# Side of the grid cells dirt events are counted in (cm)
+HOTSPOT_CELL = 50
+# Days after which the weight of a dirt event has halved
+HALF_LIFE_DAYS = 14
+# Cells whose weight decayed below this are dropped
+MIN_WEIGHT = 0.05
+
+HALF_LIFE = HALF_LIFE_DAYS * 24 * 3600
+
+
+def overlay_enabled(hass: HomeAssistant, pmap_id: str | None) -> bool:
+    """Return True if the YAML maps entry of a pmap asks for the overlay."""
+    for conf_map in hass.data[DOMAIN][CONFIG].get(CONF_MAPS) or []:
+        if conf_map.get(CONF_PMAP_ID) == pmap_id:
+            return conf_map.get(CONF_MAP_DIRT_OVERLAY, False)
+    return False
+
+
+def _dirt_events(state: dict) -> int:
+    """Return the lifetime dirt event count of a reported state."""
+    return (state.get("bbrun") or {}).get("nScrubs", 0)
+
+
+def _cell_center(key: str) -> list[float]:
+    """Return the reported coordinates of the center of a cell."""
+    cell_x, cell_y = key.split(",")
+    return [(int(cell_x) + 0.5) * HOTSPOT_CELL, (int(cell_y) + 0.5) * HOTSPOT_CELL]
+
+
+class DirtHotspots:
+    """Tag increases of the dirt event counter with the pose of the robot.
+
+    Events add to the cell of the pose in the grid of the current map.
+    Weights halve every HALF_LIFE_DAYS, decay is applied lazily to a whole
+    grid whenever it changes. Grids are saved at most once per SAVE_DELAY.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        roomba: Roomba,
+        blid: str,
+        monitor: RoombaStateMonitor,
+    ):
+        """Initialize the hotspots."""
+        self.hass = hass
+        self.blid = blid
+        self.version = 0
+        self._roomba = roomba
+        self._monitor = monitor
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.dirt.{blid}")
+        self._grids: dict[str, dict[str, Any]] = {}
+        self._scrubs: int | None = None
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when a grid changes."""
+        return SIGNAL_HOTSPOTS_UPDATED.format(self.blid)
+
+    async def async_load(self):
+        """Load the grids and take the current dirt counter as baseline."""
+        if data := await self._store.async_load():
+            self._grids = data.get("pmaps", {})
+        state = self._monitor.reported_state
+        if "bbrun" in state:
+            self._scrubs = _dirt_events(state)
+
+    @callback
+    def async_shutdown(self):
+        """Stop following the robot."""
+        self._remove_listener()
+
+    def cells(self, pmap_id: str | None) -> dict[str, float]:
+        """Return the decayed weight per cell ("x,y") of a map."""
+        if not (grid := self._grids.get(pmap_id)):
+            return {}
+        factor = 0.5 ** ((time.time() - grid["updated"]) / HALF_LIFE)
+        return {
+            key: weight * factor
+            for key, weight in grid["cells"].items()
+            if weight * factor >= MIN_WEIGHT
+        }
+
+    def ranked_rooms(self, pmap_id: str | None) -> list[tuple[Room, float]]:
+        """Return the rooms of a map by decreasing dirt weight."""
+        if (index := self.hass.data[DOMAIN][ROOM_INDEXES].get(pmap_id)) is None:
+            return []
+        scores: defaultdict[Room, float] = defaultdict(float)
+        for key, weight in self.cells(pmap_id).items():
+            if (room := index.locate(*_cell_center(key))) is not None:
+                scores[room] += weight
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Add the dirt events of a message to the cell of the pose."""
+        if "bbrun" not in delta:
+            return
+        scrubs = _dirt_events(state)
+        previous, self._scrubs = self._scrubs, scrubs
+        if previous is None or scrubs <= previous:
+            return
+        mission_state = state.get("cleanMissionStatus", {})
+        point = (state.get("pose") or {}).get("point", {})
+        x, y = point.get("x"), point.get("y")
+        if mission_state.get("cycle", "none") in IDLE_CYCLES or x is None or y is None:
+            return
+        if (pmap_id := self._roomba.current_pmap_id) is None:
+            return
+        self._async_add(pmap_id, x, y, scrubs - previous)
+
+    @callback
+    def _async_add(self, pmap_id: str, x: float, y: float, events: int):
+        """Decay the grid of a map and add events to a cell."""
+        now = time.time()
+        cells = self.cells(pmap_id)
+        key = f"{math.floor(x / HOTSPOT_CELL)},{math.floor(y / HOTSPOT_CELL)}"
+        cells[key] = cells.get(key, 0) + events
+        self._grids[pmap_id] = {
+            "updated": now,
+            "cells": {key: round(weight, 3) for key, weight in cells.items()},
+        }
+        self.version += 1
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        async_dispatcher_send(self.hass, self.signal)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {"pmaps": self._grids}
+
+
+def draw_overlay(
+    image: bytes,
+    cells: dict[str, float],
+    transform: MapTransform,
+    size: tuple[int, int] | None = None,
+) -> bytes:
+    """Return the map image with the hotspots drawn over it.
+
+    image must be at the size of the transform, the result is resized to
+    size if one is given. Uses the imaging stack, call this in the executor.
+    """
+    # pylint: disable=import-outside-toplevel
+    from PIL import Image, ImageDraw
+
+    with Image.open(io.BytesIO(image)) as base:
+        base = base.convert("RGBA")
+    overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    # A cell covers |det| times its area on the image, whatever the rotation
+    (a, b, _), (d, e, _) = transform.matrix
+    radius = max(2.0, math.sqrt(abs(a * e - b * d)) * HOTSPOT_CELL / 2)
+    top = max(cells.values())
+    centers = transform.to_image_path([_cell_center(key) for key in cells])
+    for (x, y), weight in zip(centers.tolist(), cells.values()):
+        alpha = int(60 + 160 * weight / top)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius), fill=(230, 81, 0, alpha)
+        )
+
+    result = Image.alpha_composite(base, overlay)
+    if size:
+        result = result.resize(size)
+    with io.BytesIO() as stream:
+        result.save(stream, format="PNG")
+        return stream.getvalue()
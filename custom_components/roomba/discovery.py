@@ -0,0 +1,322 @@
+"""Discover iRobot devices on the local network."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, replace
+import ipaddress
+import json
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_PORT = 5678
+DISCOVERY_MESSAGE = b"irobotmcs"
+BROADCAST_ADDRESS = "255.255.255.255"
+
+# Seconds after the start at which the request is repeated. The first ones are
+# close together for robots that are awake, later ones give sleeping robots
+# time to wake up.
+BROADCAST_SCHEDULE = (0, 0.5, 1.5, 3.5, 7.5)
+DISCOVERY_TIMEOUT = 10
+
+# Limits when probing a list of hosts or a network range
+PROBE_CONCURRENCY = 32
+PROBE_TIMEOUT = 3
+MAX_PROBE_HOSTS = 1024
+
+DISCOVERY_CACHE = "roomba_discovery_cache"
+# Seconds a robot that stopped answering is still offered from the cache
+DISCOVERY_CACHE_TTL = 300
+
+
+@dataclass
+class DiscoveredRoomba:
+    """A robot that answered a discovery request."""
+
+    blid: str
+    ip: str
+    robot_name: str | None
+    firmware: str | None = None
+    mac: str | None = None
+    sku: str | None = None
+    last_seen: float = 0.0
+
+
+def parse_discovery_response(data: bytes, address: str) -> DiscoveredRoomba | None:
+    """Return the robot described by a discovery response."""
+    if data == DISCOVERY_MESSAGE:
+        # Our own broadcast
+        return None
+    try:
+        response = json.loads(data.decode())
+        hostname = response["hostname"]
+    except (UnicodeDecodeError, ValueError, KeyError, TypeError):
+        return None
+    if not hostname.startswith(("Roomba-", "iRobot-")):
+        return None
+
+    return DiscoveredRoomba(
+        blid=hostname.split("-", 1)[1],
+        ip=response.get("ip") or address,
+        robot_name=response.get("robotname"),
+        firmware=response.get("sw"),
+        mac=response.get("mac"),
+        sku=response.get("sku"),
+        last_seen=time.time(),
+    )
+
+
+class RoombaDiscoveryProtocol(asyncio.DatagramProtocol):
+    """Collect the answers to discovery requests."""
+
+    def __init__(self):
+        """Initialize the protocol."""
+        self.responses: asyncio.Queue[DiscoveredRoomba] = asyncio.Queue()
+        self.error: OSError | None = None
+
+    def datagram_received(self, data, addr):
+        """Queue answers from iRobot devices."""
+        if device := parse_discovery_response(data, addr[0]):
+            self.responses.put_nowait(device)
+
+    def error_received(self, exc):
+        """Keep the error for the request that caused it."""
+        _LOGGER.debug("Discovery error: %s", exc)
+        self.error = exc
+
+
+async def async_discover(
+    host: str | None = None, timeout: float = DISCOVERY_TIMEOUT
+) -> AsyncIterator[DiscoveredRoomba]:
+    """Yield robots as soon as they answer.
+
+    With a host the request is sent to that address only, otherwise it is
+    broadcast. One socket is used for all repetitions of the request. Raises
+    OSError if the first request cannot be sent, repetitions stop at the
+    first one that fails.
+    """
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        RoombaDiscoveryProtocol, local_addr=("0.0.0.0", 0), allow_broadcast=True
+    )
+    target = (host or BROADCAST_ADDRESS, DISCOVERY_PORT)
+
+    def _send_request():
+        # Send errors are raised or reported to the protocol, by event loop
+        protocol.error = None
+        transport.sendto(DISCOVERY_MESSAGE, target)
+        if protocol.error:
+            raise protocol.error
+
+    async def _async_send_requests(started):
+        for offset in BROADCAST_SCHEDULE[1:]:
+            await asyncio.sleep(max(0, started + offset - loop.time()))
+            _send_request()
+
+    sender = None
+    deadline = loop.time() + timeout
+    try:
+        _send_request()
+        sender = asyncio.create_task(_async_send_requests(loop.time()))
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                device = await asyncio.wait_for(protocol.responses.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if host is None or device.ip == host:
+                yield device
+    finally:
+        if sender:
+            sender.cancel()
+            try:
+                await sender
+            except asyncio.CancelledError:
+                pass
+            except OSError as err:
+                _LOGGER.debug("Repeating the discovery request failed: %s", err)
+        transport.close()
+
+
+def parse_hosts(hosts: str) -> list[str]:
+    """Return the addresses in a list of hosts and network ranges.
+
+    Entries are separated by commas or whitespace, ranges use CIDR notation.
+    Raises ValueError for invalid ranges or too many addresses.
+    """
+    addresses: dict[str, None] = {}
+    for entry in hosts.replace(",", " ").split():
+        if "/" not in entry:
+            addresses[entry] = None
+            continue
+        network = ipaddress.ip_network(entry, strict=False)
+        if network.num_addresses > MAX_PROBE_HOSTS:
+            raise ValueError(f"{entry} has more than {MAX_PROBE_HOSTS} addresses")
+        addresses.update((str(address), None) for address in network.hosts())
+        if len(addresses) > MAX_PROBE_HOSTS:
+            raise ValueError(f"More than {MAX_PROBE_HOSTS} addresses")
+    return list(addresses)
+
+
+async def async_probe(
+    hosts: Iterable[str],
+    limit: int = PROBE_CONCURRENCY,
+    timeout: float = PROBE_TIMEOUT,
+) -> AsyncIterator[DiscoveredRoomba]:
+    """Ask every host directly, at most limit at a time.
+
+    Robots are yielded as soon as they answer, for networks that broadcasts
+    do not reach.
+    """
+    semaphore = asyncio.Semaphore(limit)
+    found: asyncio.Queue[DiscoveredRoomba | None] = asyncio.Queue()
+
+    async def _async_probe_host(host):
+        async with semaphore:
+            responses = async_discover(host, timeout)
+            try:
+                async for device in responses:
+                    found.put_nowait(device)
+                    return
+            except OSError as err:
+                _LOGGER.debug("Probing %s failed: %s", host, err)
+            finally:
+                await responses.aclose()
+
+    async def _async_probe_all():
+        try:
+            await asyncio.gather(*(_async_probe_host(host) for host in hosts))
+        finally:
+            found.put_nowait(None)
+
+    prober = asyncio.create_task(_async_probe_all())
+    try:
+        while device := await found.get():
+            yield device
+    finally:
+        prober.cancel()
+
+
+class RoombaDiscoveryCache:
+    """Robots seen by any discovery run or DHCP event, for all config flows.
+
+    Concurrent requests for a broadcast share the run that is in flight.
+    BLIDs are compared without case, DHCP hostnames are lowercase.
+    """
+
+    def __init__(self, ttl: float = DISCOVERY_CACHE_TTL):
+        """Initialize the cache."""
+        self.ttl = ttl
+        self._devices: dict[str, DiscoveredRoomba] = {}
+        self._broadcast: asyncio.Task | None = None
+
+    @callback
+    def async_update(self, device: DiscoveredRoomba):
+        """Store a robot that answered a discovery request."""
+        for blid in [
+            blid
+            for blid, known in self._devices.items()
+            if known.ip == device.ip and blid.casefold() != device.blid.casefold()
+        ]:
+            # Stale address, or a blid truncated by a DHCP hostname
+            del self._devices[blid]
+        self._devices[device.blid] = device
+
+    @callback
+    def async_update_from_dhcp(self, blid: str, ip: str):
+        """Store the address of a robot reported by DHCP.
+
+        The hostname may be truncated, so a robot already known under a longer
+        BLID at the same address is only marked as seen.
+        """
+        now = time.time()
+        for known in self._devices.values():
+            if known.blid.casefold().startswith(blid.casefold()):
+                if known.ip == ip:
+                    known.last_seen = now
+                    return
+                self._devices[known.blid] = replace(known, ip=ip, last_seen=now)
+                return
+        self._devices[blid] = DiscoveredRoomba(
+            blid=blid, ip=ip, robot_name=None, last_seen=now
+        )
+
+    @callback
+    def async_get(self, host: str) -> DiscoveredRoomba | None:
+        """Return the robot at host if it was seen recently."""
+        for device in self.async_get_all():
+            if device.ip == host:
+                return device
+        return None
+
+    @callback
+    def async_get_all(self) -> list[DiscoveredRoomba]:
+        """Return the robots seen recently."""
+        expired = time.time() - self.ttl
+        return [
+            device for device in self._devices.values() if device.last_seen > expired
+        ]
+
+    async def async_discover_host(
+        self, host: str, timeout: float
+    ) -> list[DiscoveredRoomba]:
+        """Return the robot at host, asking it only if needed."""
+        if (device := self.async_get(host)) and device.robot_name:
+            return [device]
+        if self._broadcast and not self._broadcast.done():
+            await asyncio.shield(self._broadcast)
+            if (device := self.async_get(host)) and device.robot_name:
+                return [device]
+
+        responses = async_discover(host, timeout)
+        try:
+            async for device in responses:
+                self.async_update(device)
+                return [device]
+        finally:
+            await responses.aclose()
+        return []
+
+    async def async_probe_hosts(
+        self, hosts: list[str]
+    ) -> AsyncIterator[DiscoveredRoomba]:
+        """Yield the robots among hosts as they answer."""
+        missing = []
+        for host in hosts:
+            if (device := self.async_get(host)) and device.robot_name:
+                yield device
+            else:
+                missing.append(host)
+
+        responses = async_probe(missing)
+        try:
+            async for device in responses:
+                self.async_update(device)
+                yield device
+        finally:
+            await responses.aclose()
+
+    async def async_discover_all(self, timeout: float) -> list[DiscoveredRoomba]:
+        """Broadcast and return the robots that answered or were seen recently.
+
+        The broadcast always runs, so robots powered on just now are found;
+        the cache only fills in robots that did not answer this time.
+        """
+        if self._broadcast is None or self._broadcast.done():
+            self._broadcast = asyncio.create_task(self._async_broadcast(timeout))
+        await asyncio.shield(self._broadcast)
+        return [device for device in self.async_get_all() if device.robot_name]
+
+    async def _async_broadcast(self, timeout: float):
+        """Broadcast a discovery request and store the answers."""
+        async for device in async_discover(timeout=timeout):
+            self.async_update(device)
+
+
+@callback
+def async_get_discovery_cache(hass: HomeAssistant) -> RoombaDiscoveryCache:
+    """Return the discovery cache shared by all config flows."""
+    return hass.data.setdefault(DISCOVERY_CACHE, RoombaDiscoveryCache())
@@ -0,0 +1,213 @@
+"""Split room cleaning across several robots."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+from typing import Any
+import uuid
+
+import voluptuous as vol
+
+from homeassistant.components.vacuum import STATE_CLEANING, STATE_DOCKED, STATE_IDLE
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from .const import (
+    DOMAIN,
+    MISSION_HISTORY,
+    REGION_CATALOG,
+    SERVICE_FLEET_CLEAN_ROOMS,
+    STATE_MONITOR,
+    VACUUM_ENTITY,
+)
+from .mission_history import IDLE_CYCLES
+from .region_catalog import region_key
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_FLEET_CLEAN_COMPLETED = "roomba_fleet_clean_completed"
+
+ATTR_PMAP = "pmap"
+ATTR_REGIONS = "regions"
+ATTR_MIN_BATTERY = "min_battery"
+ATTR_JOB_ID = "job_id"
+ATTR_ROBOTS = "robots"
+
+DEFAULT_MIN_BATTERY = 50
+# Minutes assumed for regions that were never cleaned in a room cleaning
+DEFAULT_REGION_DURATION = 10
+# Seconds after which a robot that is still cleaning is reported as unfinished
+FLEET_JOB_TIMEOUT = 4 * 3600
+
+FLEET_CLEAN_ROOMS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
+        vol.Optional(ATTR_PMAP): cv.string,
+        vol.Required(ATTR_REGIONS): cv.ensure_list,
+        vol.Optional(ATTR_MIN_BATTERY, default=DEFAULT_MIN_BATTERY): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=100)
+        ),
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+@dataclass
+class FleetRobot:
+    """A robot taking part in a fleet cleaning."""
+
+    domain_data: dict[str, Any]
+    pmap_id: str
+    capacity: float
+    load: float = 0.0
+    regions: list[dict[str, str]] = field(default_factory=list)
+
+    @property
+    def entity(self):
+        """Return the vacuum entity of the robot."""
+        return self.domain_data[VACUUM_ENTITY]
+
+
+def async_setup_fleet_services(hass: HomeAssistant):
+    """Register the fleet services."""
+
+    async def _async_fleet_clean_rooms(service_call: ServiceCall):
+        await async_fleet_clean_rooms(hass, service_call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FLEET_CLEAN_ROOMS,
+        _async_fleet_clean_rooms,
+        schema=FLEET_CLEAN_ROOMS_SCHEMA,
+    )
+
+
+async def async_fleet_clean_rooms(hass: HomeAssistant, service_call: ServiceCall):
+    """Split regions across the available robots and start them together."""
+    entity_ids = await async_extract_entity_ids(hass, service_call)
+    if not entity_ids:
+        raise HomeAssistantError("No robot selected for the fleet cleaning")
+    robots = _async_available_robots(
+        hass,
+        entity_ids,
+        service_call.data.get(ATTR_PMAP),
+        service_call.data[ATTR_MIN_BATTERY],
+    )
+    if not robots:
+        raise HomeAssistantError("None of the robots is docked and charged")
+
+    assign_regions(robots, service_call.data[ATTR_REGIONS])
+    robots = [robot for robot in robots if robot.regions]
+    for robot in robots:
+        _LOGGER.debug(
+            "Fleet cleaning: %s cleans %s (%.0f min)",
+            robot.entity.entity_id,
+            robot.regions,
+            robot.load,
+        )
+
+    await asyncio.gather(
+        *(
+            robot.entity.async_clean_rooms(robot.pmap_id, robot.regions)
+            for robot in robots
+        )
+    )
+    hass.async_create_task(_async_report_completion(hass, uuid.uuid4().hex, robots))
+
+
+def _async_available_robots(hass, entity_ids, pmap, min_battery) -> list[FleetRobot]:
+    """Return the robots that can start a cleaning on the map."""
+    robots = []
+    selected = False
+    for domain_data in hass.data[DOMAIN].values():
+        if not isinstance(domain_data, dict) or not (
+            entity := domain_data.get(VACUUM_ENTITY)
+        ):
+            continue
+        if entity.entity_id not in entity_ids:
+            continue
+        selected = True
+        battery = entity.battery_level or 0
+        if entity.state not in (STATE_DOCKED, STATE_IDLE) or battery < min_battery:
+            _LOGGER.debug("Fleet cleaning: %s is not available", entity.entity_id)
+            continue
+        try:
+            pmap_id = domain_data[REGION_CATALOG].resolve_pmap(pmap)
+        except HomeAssistantError:
+            _LOGGER.debug("Fleet cleaning: %s does not know %s", entity.entity_id, pmap)
+            continue
+        robots.append(FleetRobot(domain_data, pmap_id, battery / 100))
+    if not selected:
+        raise HomeAssistantError("None of the selected entities is a robot")
+    return robots
+
+
+def assign_regions(robots: list[FleetRobot], regions: list[Any]):
+    """Assign every region to one robot, balancing the expected durations.
+
+    The longest regions are placed first, each on the robot that would finish
+    it earliest relative to its battery level.
+    """
+    jobs = []
+    for region in regions:
+        candidates = []
+        durations = []
+        for robot in robots:
+            try:
+                params = robot.domain_data[REGION_CATALOG].resolve_region(
+                    robot.pmap_id, region
+                )
+            except HomeAssistantError:
+                continue
+            candidates.append((robot, params))
+            duration = robot.domain_data[MISSION_HISTORY].region_duration(
+                robot.pmap_id, region_key(params["region_id"], params["type"])
+            )
+            if duration is not None:
+                durations.append(duration)
+        if not candidates:
+            raise HomeAssistantError(f"No robot knows the region {region}")
+        duration = (
+            sum(durations) / len(durations) if durations else DEFAULT_REGION_DURATION
+        )
+        jobs.append((duration, candidates))
+
+    for duration, candidates in sorted(jobs, key=lambda job: -job[0]):
+        robot, params = min(
+            candidates,
+            key=lambda candidate: (candidate[0].load + duration) / candidate[0].capacity,
+        )
+        robot.load += duration
+        robot.regions.append(params)
+
+
+async def _async_report_completion(hass, job_id, robots: list[FleetRobot]):
+    """Fire an event once every robot finished its part."""
+
+    async def _async_wait(robot: FleetRobot):
+        if robot.entity.state != STATE_CLEANING:
+            return False
+        return await robot.domain_data[STATE_MONITOR].async_wait_for_state(
+            lambda state: state.get("cleanMissionStatus", {}).get("cycle", "none")
+            in IDLE_CYCLES,
+            FLEET_JOB_TIMEOUT,
+        )
+
+    completed = await asyncio.gather(*(_async_wait(robot) for robot in robots))
+    hass.bus.async_fire(
+        EVENT_FLEET_CLEAN_COMPLETED,
+        {
+            ATTR_JOB_ID: job_id,
+            ATTR_ROBOTS: {
+                robot.entity.entity_id: {
+                    ATTR_REGIONS: robot.regions,
+                    "completed": done,
+                }
+                for robot, done in zip(robots, completed)
+            },
+        },
+    )
@@ -1,9 +1,7 @@
 """Base class for iRobot devices."""
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime
-import json
 import logging
 
 from homeassistant.components.vacuum import (
@@ -30,7 +28,10 @@ from homeassistant.helpers.entity import Entity
 import homeassistant.util.dt as dt_util
 
 from . import roomba_reported_state
+from .command_queue import RoombaCommandQueue
 from .const import DOMAIN
+from .job_queue import DEFAULT_MIN_BATTERY, JOB_CLEAN_ROOMS, RoombaJob, RoombaJobQueue
+from .region_catalog import REGION_TYPE_ROOM, RegionCatalog
 from roombapy import Roomba
 
 _LOGGER = logging.getLogger(__name__)
@@ -38,24 +39,16 @@ _LOGGER = logging.getLogger(__name__)
 ATTR_CLEANING_TIME = "cleaning_time"
 ATTR_CLEANED_AREA = "cleaned_area"
 ATTR_INITIATOR = "initiator"
-ATTR_TOTAL_CLEANING_TIME = "total_cleaning_time"
-ATTR_TOTAL_CLEANED_AREA = "total_cleaned_area"
-ATTR_TOTAL_JOBS = "total_jobs"
-ATTR_TOTAL_DIRT_EVENTS = "total_dirt_events"
-ATTR_TOTAL_EVACS = "total_evacs"
-ATTR_LAST_COMMAND = "last_command"
 ATTR_NOT_READY = "not_ready"
 ATTR_NOT_READY_CODE = "not_ready_code"
 ATTR_ERROR = "error"
 ATTR_ERROR_CODE = "error_code"
-ATTR_POSITION = "position"
 ATTR_SOFTWARE_VERSION = "software_version"
-ATTR_PMAP = "pmap_"
-ATTR_MAP_CURRENT_PMAP = "map_current_id"
-ATTR_MAP_MIN_COORDS = "map_min_coords"
-ATTR_MAP_MAX_COORDS = "map_max_coords"
 ATTR_DOCKED = "docked"
 
+# Seconds to wait for the robot to report a requested state
+STATE_CHANGE_TIMEOUT = 10
+
 # Commonly supported features
 SUPPORT_IROBOT = (
     SUPPORT_BATTERY
@@ -90,6 +83,32 @@ NOT_READY_MAP = {
     48: 'Path Blocked'   
 }
 
+def robot_state(reported_state):
+    """Return the vacuum state for a reported state of the robot."""
+    clean_mission_status = reported_state.get("cleanMissionStatus", {})
+    cycle = clean_mission_status.get("cycle")
+    phase = clean_mission_status.get("phase")
+    try:
+        state = STATE_MAP[phase]
+    except KeyError:
+        return STATE_ERROR
+    if cycle != "none" and state in (STATE_IDLE, STATE_DOCKED):
+        state = STATE_PAUSED
+    return state
+
+
+def total_statistics(reported_state) -> tuple[int, int, int, int, int]:
+    """Return the lifetime minutes, square feet, missions, dirt events and evacs."""
+    total = reported_state.get("bbrun") or {}
+    return (
+        total.get("hr", 0) * 60 + total.get("min", 0),
+        total.get("sqft", 0),
+        total.get("nMssn", 0),
+        total.get("nScrubs", 0),
+        total.get("nEvacs", 0),
+    )
+
+
 class IRobotEntity(Entity):
     """Base class for iRobot Entities."""
 
@@ -141,16 +160,7 @@ class IRobotEntity(Entity):
     @property
     def _robot_state(self):
         """Return the state of the vacuum cleaner."""
-        clean_mission_status = self.vacuum_state.get("cleanMissionStatus", {})
-        cycle = clean_mission_status.get("cycle")
-        phase = clean_mission_status.get("phase")
-        try:
-            state = STATE_MAP[phase]
-        except KeyError:
-            return STATE_ERROR
-        if cycle != "none" and state in (STATE_IDLE, STATE_DOCKED):
-            state = STATE_PAUSED
-        return state
+        return robot_state(self.vacuum_state)
 
     async def async_added_to_hass(self):
         """Register callback function."""
@@ -170,10 +180,19 @@ class IRobotEntity(Entity):
 class IRobotVacuum(IRobotEntity, StateVacuumEntity):
     """Base class for iRobot robots."""
 
-    def __init__(self, roomba, blid):
+    def __init__(
+        self,
+        roomba,
+        blid,
+        command_queue: RoombaCommandQueue,
+        catalog: RegionCatalog,
+    ):
         """Initialize the iRobot handler."""
         super().__init__(roomba, blid)
-        self._cap_position = self.vacuum_state.get("cap", {}).get("pose") == 1
+        self._command_queue = command_queue
+        self._catalog = catalog
+        self._monitor = command_queue.monitor
+        self.job_queue = RoombaJobQueue(self, self._monitor)
 
     @property
     def supported_features(self):
@@ -241,24 +260,6 @@ class IRobotVacuum(IRobotEntity, StateVacuumEntity):
 
         state_attrs[ATTR_DOCKED] = self.vacuum.docked
 
-        # get the last command (to help with identifying rooms/zones)
-        state_attrs[ATTR_LAST_COMMAND] = json.dumps(state.get("lastCommand",""))
-
-        #list the maps
-        map_id = 0
-        for pmap in self.pmaps:
-            state_attrs[f"{ATTR_PMAP}{map_id}"] = pmap
-            map_id += 1
-
-        # Get total statistics
-        (
-            state_attrs[ATTR_TOTAL_CLEANING_TIME],
-            state_attrs[ATTR_TOTAL_CLEANED_AREA],
-            state_attrs[ATTR_TOTAL_JOBS],
-            state_attrs[ATTR_TOTAL_DIRT_EVENTS],
-            state_attrs[ATTR_TOTAL_EVACS]
-        ) = self.get_total_statistics(state)        
-
         # Only add cleaning time and cleaned area attrs when the vacuum is
         # currently on
         if self.state == STATE_CLEANING:
@@ -278,48 +279,8 @@ class IRobotVacuum(IRobotEntity, StateVacuumEntity):
             state_attrs[ATTR_NOT_READY] = self.vacuum.not_ready_message
             state_attrs[ATTR_NOT_READY_CODE] = self.vacuum.not_ready_num
 
-        # Not all Roombas expose position data
-        # https://github.com/koalazak/dorita980/issues/48
-        if self._cap_position:
-            pos_state = state.get("pose", {})
-            position = "(0,0,0)"
-            pos_x = pos_state.get("point", {}).get("x")
-            pos_y = pos_state.get("point", {}).get("y")
-            theta = pos_state.get("theta")
-            if all(item is not None for item in (pos_x, pos_y, theta)):
-                position = f"({pos_x}, {pos_y}, {theta})"
-            state_attrs[ATTR_POSITION] = position
-
-            #get map information
-            min_c = self.vacuum.map_min_coords
-            max_c = self.vacuum.map_max_coords
-            state_attrs[ATTR_MAP_CURRENT_PMAP] = self.vacuum.current_pmap_id
-            state_attrs[ATTR_MAP_MIN_COORDS] = f"({min_c[0]},{min_c[1]})"
-            state_attrs[ATTR_MAP_MAX_COORDS] = f"({max_c[0]},{max_c[1]})"
-
         return state_attrs
 
-    def get_total_statistics(self, state) -> tuple[int, int, int, int, int]:
-        """Return the cleaning time and cleaned area from the device."""
-        if not (total := state.get("bbrun")):
-            return (0, 0)
-        
-        cleaning_time = 0
-        if clean_hrs := total.get("hr", 0):
-            clean_min = total.get("min", 0)
-            cleaning_time = clean_hrs * 60 + clean_min
-
-        if cleaned_area := total.get("sqft", 0):  # Imperial
-            # Convert to m2 if the unit_system is set to metric
-            if self.hass.config.units.is_metric:
-                cleaned_area = round(cleaned_area * 0.0929)
-
-        missions = total.get("nMssn", 0)
-        scrubs = total.get("nScrubs", 0)
-        evacs = total.get("nEvacs", 0)
-
-        return (cleaning_time, cleaned_area, missions, scrubs, evacs)        
-
     def get_cleaning_status(self, state) -> tuple[int, int, str]:
         """Return the cleaning time and cleaned area from the device."""
         if not (mission_state := state.get("cleanMissionStatus")):
@@ -341,6 +302,19 @@ class IRobotVacuum(IRobotEntity, StateVacuumEntity):
 
         return (cleaning_time, cleaned_area, initiator)
 
+    async def async_added_to_hass(self):
+        """Register callback function and follow queued jobs."""
+        await super().async_added_to_hass()
+        self.job_queue.async_start()
+
+    async def async_will_remove_from_hass(self):
+        """Drop queued jobs."""
+        self.job_queue.async_shutdown()
+
+    def new_state_filter(self, new_state):  # pylint: disable=no-self-use
+        """Poses, signal and totals are reported by the diagnostic sensors."""
+        return bool(new_state.keys() - {"pose", "signal", "bbrun", "lastCommand"})
+
     def on_message(self, json_data):
         """Update state on message change."""
         state = json_data.get("state", {}).get("reported", {})
@@ -348,49 +322,88 @@ class IRobotVacuum(IRobotEntity, StateVacuumEntity):
             _LOGGER.debug("Got new state from the vacuum: %s", json_data)
             self.schedule_update_ha_state()
 
+    async def async_wait_for_state(self, *states) -> bool:
+        """Wait until the robot reports one of the given vacuum states."""
+        if await self._monitor.async_wait_for_state(
+            lambda reported: robot_state(reported) in states, STATE_CHANGE_TIMEOUT
+        ):
+            return True
+        _LOGGER.debug("Timed out waiting for %s to report %s", self.name, states)
+        return False
+
     async def async_start(self):
         """Start or resume the cleaning task."""
         if self.state == STATE_PAUSED:
-            await self.hass.async_add_executor_job(self.vacuum.send_command, "resume")
+            await self._command_queue.async_send_command("resume")
         else:
-            await self.hass.async_add_executor_job(self.vacuum.send_command, "start")
+            await self._command_queue.async_send_command("start")
+        await self.async_wait_for_state(STATE_CLEANING)
 
     async def async_stop(self, **kwargs):
         """Stop the vacuum cleaner."""
-        await self.hass.async_add_executor_job(self.vacuum.send_command, "stop")
+        await self._command_queue.async_send_command("stop")
 
     async def async_pause(self):
         """Pause the cleaning cycle."""
-        await self.hass.async_add_executor_job(self.vacuum.send_command, "pause")
+        await self._command_queue.async_send_command("pause")
 
     async def async_return_to_base(self, **kwargs):
         """Set the vacuum cleaner to return to the dock."""
         if self.state == STATE_CLEANING:
             await self.async_pause()
-            for _ in range(0, 10):
-                if self.state == STATE_PAUSED:
-                    break
-                await asyncio.sleep(1)
-        await self.hass.async_add_executor_job(self.vacuum.send_command, "dock")
+            await self.async_wait_for_state(STATE_PAUSED)
+        await self._command_queue.async_send_command("dock")
 
     async def async_locate(self, **kwargs):
         """Located vacuum."""
-        await self.hass.async_add_executor_job(self.vacuum.send_command, "find")
+        await self._command_queue.async_send_command("find")
 
     async def async_send_command(self, command, params=None, **kwargs):
         """Send raw command."""
         _LOGGER.debug("async_send_command %s (%s), %s", command, params, kwargs)
-        await self.hass.async_add_executor_job(
-            self.vacuum.send_command, command, params
-        )
+        await self._command_queue.async_send_command(command, params)
 
     async def async_clean_rooms(self, map, regions):
-        #rooms_obj = json.load(f"{{rooms: {rooms}}}")
-
+        """Clean regions given by name, id or command parameters."""
+        pmap_id = self._catalog.resolve_pmap(map)
         params = {
             "ordered": 1,
-            "pmap_id": self.pmaps[0] if not map else map,
-            "regions": regions
+            "pmap_id": pmap_id,
+            "regions": [
+                self._catalog.resolve_region(pmap_id, region) for region in regions
+            ],
         }
-#            "regions": rooms_obj["rooms"]
         await self.async_send_command('start', params)
+        await self.async_wait_for_state(STATE_CLEANING)
+
+    async def async_name_map(self, pmap, name=None):
+        """Name a map so it can be used by name in clean_rooms."""
+        self._catalog.async_name_pmap(pmap, name)
+
+    async def async_name_region(
+        self, region_id, type=REGION_TYPE_ROOM, pmap=None, name=None
+    ):  # pylint: disable=redefined-builtin
+        """Name a region so it can be used by name in clean_rooms."""
+        self._catalog.async_name_region(pmap, region_id, type, name)
+
+    async def async_enqueue_job(
+        self,
+        command=JOB_CLEAN_ROOMS,
+        pmap=None,
+        regions=None,
+        fan_speed=None,
+        min_battery=DEFAULT_MIN_BATTERY,
+    ):
+        """Queue a cleaning that starts once the robot is ready."""
+        if command == JOB_CLEAN_ROOMS:
+            # Resolve now so that unknown names fail the service call
+            pmap_id = self._catalog.resolve_pmap(pmap)
+            for region in regions or []:
+                self._catalog.resolve_region(pmap_id, region)
+        self.job_queue.async_enqueue(
+            RoombaJob(command, pmap, regions or [], fan_speed, min_battery)
+        )
+
+    async def async_clear_jobs(self):
+        """Drop the queued cleanings."""
+        self.job_queue.async_clear()
@@ -0,0 +1,150 @@
+"""Jobs run one after another as the robot becomes ready."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass, field
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.vacuum import STATE_CLEANING, SUPPORT_FAN_SPEED
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .mission_history import IDLE_CYCLES
+from .state_monitor import RoombaStateMonitor
+
+if TYPE_CHECKING:
+    from .irobot_base import IRobotVacuum
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_JOB_STARTED = "roomba_job_started"
+
+JOB_START = "start"
+JOB_CLEAN_ROOMS = "clean_rooms"
+JOB_COMMANDS = (JOB_START, JOB_CLEAN_ROOMS)
+
+DEFAULT_MIN_BATTERY = 80
+# Phases in which an idle robot can take the next job
+READY_PHASES = ("", "charge", "stop")
+# Jobs the robot did not start that often are dropped
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class RoombaJob:
+    """A queued cleaning."""
+
+    command: str
+    pmap: str | None = None
+    regions: list[Any] = field(default_factory=list)
+    fan_speed: str | None = None
+    min_battery: int = DEFAULT_MIN_BATTERY
+    attempts: int = 0
+
+
+def is_ready(state: dict, min_battery: int) -> bool:
+    """Return True if no mission runs and the battery is charged enough."""
+    mission_state = state.get("cleanMissionStatus", {})
+    return (
+        mission_state.get("cycle", "none") in IDLE_CYCLES
+        and mission_state.get("phase", "") in READY_PHASES
+        and (state.get("batPct") or 0) >= min_battery
+    )
+
+
+class RoombaJobQueue:
+    """Start queued jobs when the reported state shows the robot is ready.
+
+    The queue follows the state messages of the robot, the next job starts on
+    the first message after the previous mission ended and the battery was
+    recharged to the threshold of the job. A job the robot did not start is
+    tried again on the next mission status, not on pose or signal updates.
+    """
+
+    def __init__(self, vacuum: IRobotVacuum, monitor: RoombaStateMonitor):
+        """Initialize the queue."""
+        self._vacuum = vacuum
+        self._monitor = monitor
+        self._jobs: deque[RoombaJob] = deque()
+        self._starting = False
+        self._retrying = False
+        self._remove_listener: CALLBACK_TYPE | None = None
+
+    @property
+    def jobs(self) -> list[dict[str, Any]]:
+        """Return the queued jobs."""
+        return [asdict(job) for job in self._jobs]
+
+    @callback
+    def async_start(self):
+        """Start following the robot."""
+        self._remove_listener = self._monitor.async_add_listener(self._async_on_state)
+
+    @callback
+    def async_shutdown(self):
+        """Stop following the robot, queued jobs are dropped."""
+        if self._remove_listener:
+            self._remove_listener()
+            self._remove_listener = None
+        self._jobs.clear()
+
+    @callback
+    def async_enqueue(self, job: RoombaJob):
+        """Queue a job, it starts right away if the robot is ready."""
+        self._jobs.append(job)
+        _LOGGER.debug(
+            "%s: queued %s, %d job(s)", self._vacuum.name, job, len(self._jobs)
+        )
+        state = self._monitor.reported_state
+        self._async_on_state(state, state)
+
+    @callback
+    def async_clear(self):
+        """Drop all queued jobs, a running mission is not stopped."""
+        self._jobs.clear()
+        self._retrying = False
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Start the next job once the robot is ready for it."""
+        if self._starting or not self._jobs:
+            return
+        if self._retrying and "cleanMissionStatus" not in delta:
+            return
+        self._retrying = False
+        if not is_ready(state, self._jobs[0].min_battery):
+            return
+        self._starting = True
+        self._vacuum.hass.async_create_task(self._async_run(self._jobs.popleft()))
+
+    async def _async_run(self, job: RoombaJob):
+        """Start a job, it is queued again if the robot does not start."""
+        vacuum = self._vacuum
+        job.attempts += 1
+        try:
+            if job.fan_speed and vacuum.supported_features & SUPPORT_FAN_SPEED:
+                await vacuum.async_set_fan_speed(job.fan_speed)
+            if job.command == JOB_CLEAN_ROOMS:
+                await vacuum.async_clean_rooms(job.pmap, job.regions)
+            else:
+                await vacuum.async_start()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("%s: starting %s failed", vacuum.name, job)
+
+        self._starting = False
+        if vacuum.state == STATE_CLEANING:
+            vacuum.hass.bus.async_fire(
+                EVENT_JOB_STARTED,
+                {
+                    "entity_id": vacuum.entity_id,
+                    "job": asdict(job),
+                    "remaining": len(self._jobs),
+                },
+            )
+        elif job.attempts < MAX_ATTEMPTS:
+            self._jobs.appendleft(job)
+            self._retrying = True
+        else:
+            _LOGGER.warning(
+                "%s: dropping %s, the robot did not start", vacuum.name, job
+            )
@@ -0,0 +1,77 @@
+"""Latency histograms of the commands sent to a robot."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any
+
+# Upper bounds of the histogram buckets in milliseconds, the last bucket
+# counts everything slower
+BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Queued until handed to the MQTT client, including connecting
+STAGE_QUEUE = "queue"
+# Publishing in the executor
+STAGE_PUBLISH = "publish"
+# Published until the reported state reflects the command
+STAGE_ROBOT = "robot"
+# Queued until the reported state reflects the command
+STAGE_TOTAL = "total"
+
+
+class LatencyHistogram:
+    """Count latencies in fixed buckets."""
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        """Count one latency."""
+        milliseconds = seconds * 1000
+        self.counts[bisect_left(BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "max_ms": round(self.max, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class CommandLatency:
+    """Latency histograms per command and stage for one robot."""
+
+    def __init__(self):
+        """Initialize the histograms."""
+        self._histograms: defaultdict[str, defaultdict[str, LatencyHistogram]] = (
+            defaultdict(lambda: defaultdict(LatencyHistogram))
+        )
+        self._timeouts: defaultdict[str, int] = defaultdict(int)
+
+    def record(self, command: str, stage: str, seconds: float):
+        """Count the latency of a stage of a command."""
+        self._histograms[command][stage].add(seconds)
+
+    def record_timeout(self, command: str):
+        """Count a command the robot did not acknowledge in time."""
+        self._timeouts[command] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all histograms for diagnostics."""
+        return {
+            command: {
+                **{stage: hist.as_dict() for stage, hist in stages.items()},
+                "timeouts": self._timeouts.get(command, 0),
+            }
+            for command, stages in self._histograms.items()
+        }
@@ -0,0 +1,194 @@
+"""Placement of robot coordinates on a configured map."""
+from __future__ import annotations
+
+import logging
+import math
+from typing import TYPE_CHECKING, Any, Iterable
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_MAP_ANGLE,
+    CONF_MAP_FLOORPLAN_IMAGE,
+    CONF_MAP_MAX_X,
+    CONF_MAP_MAX_Y,
+    CONF_MAP_MIN_X,
+    CONF_MAP_MIN_Y,
+    CONF_MAPS,
+    CONF_PMAP_ID,
+    DOMAIN,
+    MAP_TRANSFORMS,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bounds, rotation and image size roombapy draws maps without config with
+DEFAULT_MIN = (-1000, -1000)
+DEFAULT_MAX = (1000, 1000)
+DEFAULT_ANGLE = 0.0
+DEFAULT_SIZE = (1000, 1000)
+
+
+def _axis_scale(start: float, end: float, size: float) -> tuple[float, float]:
+    """Return factor and offset scaling start..end to 0..size like roombapy."""
+    low, high = min(start, end), max(start, end)
+    if low == high:
+        return 0.0, 0.0
+    factor = size / (high - low)
+    if start > end:
+        return -factor, size + low * factor
+    return factor, -low * factor
+
+
+class MapTransform:
+    """Place reported poses on a map the way the roombapy mapper does.
+
+    The robot reports x and y swapped relative to the map, the map is
+    rotated by its angle and the configured bounds are scaled to the image.
+    All of it is one affine matrix, computed once, followed by clamping to
+    the image, so whole paths are placed with a single NumPy operation.
+    """
+
+    def __init__(
+        self,
+        min_coords: tuple[int, int] = DEFAULT_MIN,
+        max_coords: tuple[int, int] = DEFAULT_MAX,
+        angle: float = DEFAULT_ANGLE,
+        size: tuple[int, int] = DEFAULT_SIZE,
+    ):
+        """Initialize the transform of a map and compute its matrix."""
+        self.min_coords = min_coords
+        self.max_coords = max_coords
+        self.angle = angle % 360
+        self.size = size
+        self.limits = (size[0] - 1, size[1] - 1)
+
+        radians = math.radians(self.angle)
+        cos, sin = math.cos(radians), math.sin(radians)
+        # Rotation of the swapped point (y, x), as rows for image x and y
+        row_x = [-sin, cos]
+        row_y = [cos, sin]
+        # roombapy mirrors the rotation about the point for inverted axes
+        if min_coords[0] > max_coords[0]:
+            row_x = [sin, 2 - cos]
+        if min_coords[1] < max_coords[1]:
+            row_y = [2 - cos, -sin]
+        factor_x, offset_x = _axis_scale(min_coords[0], max_coords[0], self.limits[0])
+        factor_y, offset_y = _axis_scale(min_coords[1], max_coords[1], self.limits[1])
+        self.matrix = (
+            (factor_x * row_x[0], factor_x * row_x[1], offset_x),
+            (factor_y * row_y[0], factor_y * row_y[1], offset_y),
+        )
+        self._array: np.ndarray | None = None
+
+    @classmethod
+    def from_config(
+        cls, conf_map: dict[str, Any] | None, size: tuple[int, int] = DEFAULT_SIZE
+    ) -> MapTransform:
+        """Return the transform of a YAML maps entry, the default without one.
+
+        size is the size of the image the map is drawn on, see floorplan_size.
+        """
+        if not conf_map:
+            return cls(size=size)
+        return cls(
+            (
+                conf_map.get(CONF_MAP_MIN_X, DEFAULT_MIN[0]),
+                conf_map.get(CONF_MAP_MIN_Y, DEFAULT_MIN[1]),
+            ),
+            (
+                conf_map.get(CONF_MAP_MAX_X, DEFAULT_MAX[0]),
+                conf_map.get(CONF_MAP_MAX_Y, DEFAULT_MAX[1]),
+            ),
+            conf_map.get(CONF_MAP_ANGLE) or DEFAULT_ANGLE,
+            size,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the bounds and rotation for clients."""
+        return {
+            "min": list(self.min_coords),
+            "max": list(self.max_coords),
+            "angle": self.angle,
+            "size": list(self.size),
+        }
+
+    @property
+    def prepared(self) -> bool:
+        """Return True once the NumPy matrix is built."""
+        return self._array is not None
+
+    def prepare(self):
+        """Build the NumPy matrix, importing NumPy if needed.
+
+        Importing NumPy blocks, call this in the executor.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        self._array = np.array(self.matrix, dtype=float)
+
+    def to_image(self, x: float, y: float) -> tuple[float, float]:
+        """Return the image position of a single reported point."""
+        (a, b, c), (d, e, f) = self.matrix
+        return (
+            min(max(a * x + b * y + c, 0.0), self.limits[0]),
+            min(max(d * x + e * y + f, 0.0), self.limits[1]),
+        )
+
+    def to_image_path(self, points: Iterable[list[int]]) -> np.ndarray:
+        """Return the image positions of reported points as an n x 2 array."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        if self._array is None:
+            self.prepare()
+        coords = np.asarray(points, dtype=float).reshape(-1, 2)
+        image = coords @ self._array[:, :2].T + self._array[:, 2]
+        return np.clip(image, 0, self.limits, out=image)
+
+
+def floorplan_size(conf_map: dict[str, Any]) -> tuple[int, int]:
+    """Return the size roombapy draws a map at, that of its floorplan image.
+
+    Reads the image header, call this in the executor.
+    """
+    if not (path := conf_map.get(CONF_MAP_FLOORPLAN_IMAGE)):
+        return DEFAULT_SIZE
+    # pylint: disable=import-outside-toplevel
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except OSError as err:
+        _LOGGER.warning("Could not read the floorplan %s: %s", path, err)
+        return DEFAULT_SIZE
+
+
+def build_map_transforms(maps: list[dict[str, Any]] | None) -> dict[str, MapTransform]:
+    """Return the transform of every YAML maps entry by pmap id.
+
+    The transform of maps without config is kept under None. NumPy is only
+    imported once a path is placed, not for setups that never draw one.
+    """
+    transforms = {None: MapTransform()}
+    for conf_map in maps or []:
+        transforms[conf_map[CONF_PMAP_ID]] = MapTransform.from_config(
+            conf_map, floorplan_size(conf_map)
+        )
+    return transforms
+
+
+async def async_setup_map_transforms(hass: HomeAssistant, conf: dict[str, Any]):
+    """Compute the transforms of the configured maps once at setup."""
+    hass.data[DOMAIN][MAP_TRANSFORMS] = await hass.async_add_executor_job(
+        build_map_transforms, conf.get(CONF_MAPS)
+    )
+
+
+def get_map_transform(hass: HomeAssistant, pmap_id: str | None) -> MapTransform:
+    """Return the transform of a pmap, the default one if it is not configured."""
+    transforms = hass.data[DOMAIN][MAP_TRANSFORMS]
+    return transforms.get(pmap_id) or transforms[None]
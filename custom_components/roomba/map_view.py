@@ -0,0 +1,175 @@
+"""HTTP view serving the mission map as SVG or GeoJSON."""
+from __future__ import annotations
+
+from http import HTTPStatus
+import json
+import math
+from typing import Any
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import PATH_TRACKER, ROOMBA_SESSION
+from .map_transform import MapTransform, get_map_transform
+from .path_tracker import PathTracker
+from .websocket import async_get_domain_data
+
+FORMAT_SVG = "svg"
+FORMAT_GEOJSON = "geojson"
+CONTENT_TYPES = {
+    FORMAT_SVG: "image/svg+xml",
+    FORMAT_GEOJSON: "application/geo+json",
+}
+
+# Length of the heading marker of the robot, in reported units (cm)
+HEADING_LENGTH = 20
+
+
+@callback
+def async_setup_map_view(hass: HomeAssistant):
+    """Register the map view."""
+    hass.http.register_view(RoombaVectorMapView)
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    """Return True if the client already holds the version of etag."""
+    if_none_match = request.headers.get(hdrs.IF_NONE_MATCH, "")
+    return any(
+        tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> web.Response:
+    """Return an empty response telling the client to keep its copy."""
+    return web.Response(status=HTTPStatus.NOT_MODIFIED, headers={hdrs.ETAG: etag})
+
+
+class RoombaVectorMapView(HomeAssistantView):
+    """Serve path, robot and dock of the current map.
+
+    Positions are in the pixel space of the map image, so the output lines
+    up with the camera image and any floorplan drawn for the map.
+    """
+
+    url = "/api/roomba/map/{blid}.{fmt}"
+    name = "api:roomba:map"
+
+    async def get(self, request: web.Request, blid: str, fmt: str) -> web.Response:
+        """Return the map, or 304 if the client has the current version."""
+        if fmt not in CONTENT_TYPES:
+            return self.json_message("Unknown format", HTTPStatus.NOT_FOUND)
+        hass: HomeAssistant = request.app["hass"]
+        if (domain_data := async_get_domain_data(hass, blid)) is None:
+            return self.json_message("Unknown robot", HTTPStatus.NOT_FOUND)
+
+        tracker: PathTracker = domain_data[PATH_TRACKER]
+        pmap_id = domain_data[ROOMBA_SESSION].current_pmap_id
+        etag = f'"{tracker.version}-{pmap_id}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        transform = get_map_transform(hass, pmap_id)
+        if not transform.prepared:
+            await hass.async_add_executor_job(transform.prepare)
+        if fmt == FORMAT_SVG:
+            body = render_svg(tracker, transform)
+        else:
+            body = json.dumps(render_geojson(tracker, transform, pmap_id))
+        return web.Response(
+            body=body,
+            content_type=CONTENT_TYPES[fmt],
+            headers={hdrs.ETAG: etag, hdrs.CACHE_CONTROL: "no-cache"},
+        )
+
+
+def _robot_marker(
+    tracker: PathTracker, transform: MapTransform
+) -> tuple[tuple[float, float], tuple[float, float]] | None:
+    """Return the image position of the robot and of its heading."""
+    if tracker.pose is None:
+        return None
+    x, y, theta = tracker.pose
+    heading = math.radians(theta or 0)
+    return transform.to_image(x, y), transform.to_image(
+        x + HEADING_LENGTH * math.cos(heading), y + HEADING_LENGTH * math.sin(heading)
+    )
+
+
+def _round(point: tuple[float, float]) -> list[float]:
+    """Round an image position for output."""
+    return [round(point[0], 1), round(point[1], 1)]
+
+
+def render_svg(tracker: PathTracker, transform: MapTransform) -> str:
+    """Return the map as an SVG document."""
+    width, height = transform.size
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'viewBox="0 0 {width} {height}" width="{width}" height="{height}">'
+    ]
+    if tracker.path:
+        points = " ".join(
+            f"{x},{y}" for x, y in transform.to_image_path(tracker.path).round(1).tolist()
+        )
+        parts.append(
+            '<polyline class="path" fill="none" stroke="#2196f3" stroke-width="4" '
+            f'stroke-linejoin="round" stroke-linecap="round" points="{points}"/>'
+        )
+    dock_x, dock_y = _round(transform.to_image(0, 0))
+    parts.append(
+        f'<circle class="dock" cx="{dock_x}" cy="{dock_y}" r="10" fill="#4caf50"/>'
+    )
+    if marker := _robot_marker(tracker, transform):
+        (robot_x, robot_y), (head_x, head_y) = map(_round, marker)
+        parts.append(
+            f'<g class="robot"><circle cx="{robot_x}" cy="{robot_y}" r="12" '
+            'fill="#607d8b"/>'
+            f'<line x1="{robot_x}" y1="{robot_y}" x2="{head_x}" y2="{head_y}" '
+            'stroke="#ffffff" stroke-width="3"/></g>'
+        )
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_geojson(
+    tracker: PathTracker, transform: MapTransform, pmap_id: str | None
+) -> dict[str, Any]:
+    """Return the map as a GeoJSON feature collection."""
+    features: list[dict[str, Any]] = [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": transform.to_image_path(tracker.path).round(1).tolist(),
+            },
+            "properties": {"kind": "path", "mission": tracker.mission},
+        },
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": _round(transform.to_image(0, 0)),
+            },
+            "properties": {"kind": "dock"},
+        },
+    ]
+    if marker := _robot_marker(tracker, transform):
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": _round(marker[0])},
+                "properties": {"kind": "robot", "heading": _round(marker[1])},
+            }
+        )
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "roomba": {
+            "pmap_id": pmap_id,
+            "seq": tracker.seq,
+            "mission": tracker.mission,
+            **transform.as_dict(),
+        },
+    }
@@ -0,0 +1,62 @@
+"""Map rendering configuration for iRobot devices."""
+from typing import Any
+
+from roombapy.mapping import DEFAULT_ICON_SIZE, RoombaMap
+from roombapy.mapping.roomba_map_device import RoombaMapDevice
+from roombapy.roomba import Roomba
+
+from homeassistant.const import CONF_NAME
+
+from .const import *
+
+
+def initialize_mapping_config(roomba: Roomba, conf: dict[str,Any]):           
+    if CONF_ICONS in conf:
+        for conf_icon in conf[CONF_ICONS]:
+            s = DEFAULT_ICON_SIZE
+            if CONF_ICON_WIDTH in conf_icon and CONF_ICON_HEIGHT in conf_icon:
+                s = (conf_icon[CONF_ICON_WIDTH], conf_icon[CONF_ICON_HEIGHT])
+
+            roomba.add_map_icon_set(
+                conf_icon[CONF_NAME], 
+                conf_icon[CONF_ICON_BASE_PATH],
+                conf_icon.get(CONF_ICON_HOME,None),
+                conf_icon.get(CONF_ICON_ROOMBA,None),
+                conf_icon.get(CONF_ICON_ERROR,None),
+                conf_icon.get(CONF_ICON_CANCELLED,None),
+                conf_icon.get(CONF_ICON_BATTERY_LOW,None),
+                conf_icon.get(CONF_ICON_CHARGING,None),
+                conf_icon.get(CONF_ICON_BIN_FULL,None),
+                conf_icon.get(CONF_ICON_TANK_LOW,None),
+                s)
+
+    if CONF_DEVICES in conf:
+        for conf_dev in conf[CONF_DEVICES]:
+            device = RoombaMapDevice(
+                conf_dev[CONF_BLID],
+                conf_dev.get(CONF_MAP_ICON_SET,None),
+                conf_dev.get(CONF_MAP_PATH_COLOR,None),
+                conf_dev.get(CONF_MAP_PATH_WIDTH,None),
+                conf_dev.get(CONF_MAP_BG_COLOR,None)
+            )                
+
+            roomba.add_map_device(device) 
+
+    if CONF_MAPS in conf:
+        for conf_map in conf[CONF_MAPS]:
+            map = RoombaMap(conf_map[CONF_PMAP_ID], conf_map[CONF_NAME])
+            
+            if CONF_MAP_MIN_X in conf_map and CONF_MAP_MIN_Y in conf_map:
+                map.coords_start = (conf_map[CONF_MAP_MIN_X], conf_map[CONF_MAP_MIN_Y])
+            if CONF_MAP_MAX_X in conf_map and CONF_MAP_MAX_Y in conf_map:    
+                map.coords_end = (conf_map[CONF_MAP_MAX_X], conf_map[CONF_MAP_MAX_Y])
+
+            map.angle = conf_map.get(CONF_MAP_ANGLE,None)
+            map.floorplan = conf_map.get(CONF_MAP_FLOORPLAN_IMAGE,None)
+            map.walls = conf_map.get(CONF_MAP_WALLS_IMAGE,None)
+            map.icon_set = conf_map.get(CONF_MAP_ICON_SET,None)
+            map.bg_color = conf_map.get(CONF_MAP_BG_COLOR,None)
+            map.path_color = conf_map.get(CONF_MAP_PATH_COLOR,None)
+            map.path_width = conf_map.get(CONF_MAP_PATH_WIDTH,None)
+
+            roomba.add_map_definition(map)
@@ -0,0 +1,128 @@
+"""Fire bus events on mission lifecycle transitions."""
+from __future__ import annotations
+
+import logging
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.device_registry as dr
+
+from .const import DOMAIN
+from .mission_history import IDLE_CYCLES
+from .state_monitor import RoombaStateMonitor
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_MISSION_STARTED = "roomba_mission_started"
+EVENT_MISSION_COMPLETED = "roomba_mission_completed"
+EVENT_STUCK = "roomba_stuck"
+EVENT_BIN_FULL = "roomba_bin_full"
+EVENT_DOCKED = "roomba_docked"
+EVENT_EVAC_STARTED = "roomba_evac_started"
+EVENT_NOT_READY = "roomba_not_ready"
+
+# Parts of the reported state the transitions are derived from
+WATCHED_KEYS = ("cleanMissionStatus", "bin", "dock")
+# Phases of a robot sitting on its dock, emptying the bin keeps it there
+DOCKED_PHASES = ("charge", "evac")
+
+
+class MissionFlags(NamedTuple):
+    """What the transitions are derived from, compared between messages."""
+
+    running: bool
+    stuck: bool
+    docked: bool
+    evac: bool
+    bin_full: bool
+    not_ready: int
+
+    @classmethod
+    def from_state(cls, state: dict) -> MissionFlags:
+        """Return the flags of a reported state."""
+        mission_state = state.get("cleanMissionStatus", {})
+        phase = mission_state.get("phase")
+        return cls(
+            running=mission_state.get("cycle", "none") not in IDLE_CYCLES,
+            stuck=phase == "stuck",
+            docked=phase in DOCKED_PHASES,
+            evac=phase == "evac",
+            bin_full=bool(state.get("bin", {}).get("full")),
+            not_ready=mission_state.get("notReady") or 0,
+        )
+
+
+class MissionEvents:
+    """Fire an event once per transition, not on every state message.
+
+    Messages that repeat a state, like the periodic mission status while
+    cleaning, fire nothing.
+    """
+
+    def __init__(self, hass: HomeAssistant, blid: str, monitor: RoombaStateMonitor):
+        """Initialize the events from the current state."""
+        self.hass = hass
+        self.blid = blid
+        self._flags = MissionFlags.from_state(monitor.reported_state)
+        self._device_id: str | None = None
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @callback
+    def async_shutdown(self):
+        """Stop firing events."""
+        self._remove_listener()
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Fire the events for the transitions of a message."""
+        if not any(key in delta for key in WATCHED_KEYS):
+            return
+        previous, flags = self._flags, MissionFlags.from_state(state)
+        if flags == previous:
+            return
+        self._flags = flags
+
+        if flags.running and not previous.running:
+            self._async_fire(EVENT_MISSION_STARTED, state)
+        if previous.running and not flags.running:
+            self._async_fire(EVENT_MISSION_COMPLETED, state)
+        if flags.stuck and not previous.stuck:
+            self._async_fire(EVENT_STUCK, state)
+        if flags.bin_full and not previous.bin_full:
+            self._async_fire(EVENT_BIN_FULL, state)
+        if flags.docked and not previous.docked:
+            self._async_fire(EVENT_DOCKED, state)
+        if flags.evac and not previous.evac:
+            self._async_fire(EVENT_EVAC_STARTED, state)
+        if flags.not_ready and flags.not_ready != previous.not_ready:
+            self._async_fire(EVENT_NOT_READY, state)
+
+    @callback
+    def _async_fire(self, event_type: str, state: dict):
+        """Fire an event with the mission, bin and dock state."""
+        mission_state = state.get("cleanMissionStatus", {})
+        data: dict[str, Any] = {
+            "blid": self.blid,
+            "device_id": self._async_device_id(),
+            "cycle": mission_state.get("cycle"),
+            "phase": mission_state.get("phase"),
+            "initiator": mission_state.get("initiator"),
+            "mission_minutes": mission_state.get("mssnM"),
+            "area": mission_state.get("sqft"),
+            "error": mission_state.get("error"),
+            "not_ready": mission_state.get("notReady"),
+            "bin": state.get("bin", {}),
+            "dock": state.get("dock", {}),
+        }
+        _LOGGER.debug("%s: %s", event_type, data)
+        self.hass.bus.async_fire(event_type, data)
+
+    @callback
+    def _async_device_id(self) -> str | None:
+        """Return the id of the device, for device based automations."""
+        if self._device_id is None:
+            device = dr.async_get(self.hass).async_get_device(
+                {(DOMAIN, f"roomba_{self.blid}")}
+            )
+            self._device_id = device.id if device else None
+        return self._device_id
@@ -0,0 +1,230 @@
+"""Per-robot history of cleaning missions."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta
+import json
+import logging
+import os
+import time
+from typing import Any, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN
+from .state_monitor import RoombaStateMonitor
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGNAL_MISSION_RECORDED = "roomba_mission_recorded_{}"
+
+# Cycles reported while no mission is running
+IDLE_CYCLES = ("none", "dock", "evac")
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+# How often the rolling statistics drop missions that left their window
+EXPIRE_INTERVAL = timedelta(hours=1)
+
+# Weight of the latest mission in the per-region duration estimate
+REGION_DURATION_WEIGHT = 0.3
+
+
+class MissionRecord(NamedTuple):
+    """A finished mission, stored as one JSON array per line."""
+
+    start: int
+    end: int
+    duration: int  # minutes
+    area: int  # square feet
+    initiator: str
+    pmap_id: str | None
+    regions: list[str]
+    errors: list[int]
+
+
+class RollingWindow:
+    """Sums over the missions that ended within the last seconds.
+
+    Adding a mission and expiring old ones is O(1) per mission.
+    """
+
+    def __init__(self, seconds: int):
+        """Initialize the window."""
+        self.seconds = seconds
+        self._missions: deque[MissionRecord] = deque()
+        self.count = 0
+        self.area = 0
+        self.duration = 0
+        self.failed = 0
+
+    def add(self, record: MissionRecord):
+        """Add a finished mission."""
+        self._missions.append(record)
+        self._update(record, 1)
+        self.expire()
+
+    def expire(self, now: float | None = None):
+        """Drop the missions that left the window."""
+        oldest = (now or time.time()) - self.seconds
+        while self._missions and self._missions[0].end < oldest:
+            self._update(self._missions.popleft(), -1)
+
+    def _update(self, record: MissionRecord, sign: int):
+        self.count += sign
+        self.area += sign * record.area
+        self.duration += sign * record.duration
+        self.failed += sign * bool(record.errors)
+
+
+class MissionHistory:
+    """Record missions when they end and keep rolling statistics.
+
+    Missions are appended to a JSON lines file per BLID in the storage
+    directory, only the last week is kept in memory.
+    """
+
+    def __init__(self, hass: HomeAssistant, blid: str, monitor: RoombaStateMonitor):
+        """Initialize the history."""
+        self.hass = hass
+        self.blid = blid
+        self.path = hass.config.path(STORAGE_DIR, f"{DOMAIN}.missions.{blid}.jsonl")
+        self.day = RollingWindow(DAY)
+        self.week = RollingWindow(WEEK)
+        self._mission: dict[str, Any] | None = None
+        self._region_durations: dict[tuple[str, str], float] = {}
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+        self._cancel_expire: CALLBACK_TYPE | None = None
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when the statistics change."""
+        return SIGNAL_MISSION_RECORDED.format(self.blid)
+
+    async def async_load(self):
+        """Load the missions of the last week."""
+        for record in await self.hass.async_add_executor_job(self._load, WEEK):
+            self.day.add(record)
+            self.week.add(record)
+            self._update_region_durations(record)
+        self._cancel_expire = async_track_time_interval(
+            self.hass, self._async_expire, EXPIRE_INTERVAL
+        )
+
+    def region_duration(self, pmap_id: str, region: str) -> float | None:
+        """Return the estimated minutes to clean a region ("type:id")."""
+        return self._region_durations.get((pmap_id, region))
+
+    @callback
+    def async_shutdown(self):
+        """Stop tracking missions."""
+        self._remove_listener()
+        if self._cancel_expire:
+            self._cancel_expire()
+
+    def _load(self, seconds: int) -> list[MissionRecord]:
+        """Read the missions that ended within seconds."""
+        oldest = time.time() - seconds
+        records = []
+        try:
+            with open(self.path, encoding="utf-8") as history:
+                for line in history:
+                    try:
+                        record = MissionRecord(*json.loads(line))
+                    except (ValueError, TypeError):
+                        continue
+                    if record.end >= oldest:
+                        records.append(record)
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append(self, record: MissionRecord):
+        """Append a mission to the history file."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as history:
+                history.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as err:
+            _LOGGER.error("Could not record the mission in %s: %s", self.path, err)
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Follow the running mission and record it when it ends."""
+        if "cleanMissionStatus" not in delta:
+            return
+        mission_state = state.get("cleanMissionStatus", {})
+        running = mission_state.get("cycle", "none") not in IDLE_CYCLES
+
+        if running and self._mission is None:
+            last_command = state.get("lastCommand") or {}
+            self._mission = {
+                "start": mission_state.get("mssnStrtTm") or int(time.time()),
+                "initiator": mission_state.get("initiator", ""),
+                "pmap_id": last_command.get("pmap_id"),
+                "regions": [
+                    f"{region.get('type', 'rid')}:{region.get('region_id')}"
+                    for region in last_command.get("regions") or []
+                ],
+                "duration": 0,
+                "area": 0,
+                "errors": [],
+            }
+
+        if self._mission is None:
+            return
+
+        mission = self._mission
+        mission["duration"] = max(mission["duration"], mission_state.get("mssnM") or 0)
+        mission["area"] = max(mission["area"], mission_state.get("sqft") or 0)
+        if (error := mission_state.get("error")) and error not in mission["errors"]:
+            mission["errors"].append(error)
+
+        if not running:
+            self._mission = None
+            self._async_record(
+                MissionRecord(
+                    start=mission["start"],
+                    end=int(time.time()),
+                    duration=mission["duration"],
+                    area=mission["area"],
+                    initiator=mission["initiator"],
+                    pmap_id=mission["pmap_id"],
+                    regions=mission["regions"],
+                    errors=mission["errors"],
+                )
+            )
+
+    @callback
+    def _async_record(self, record: MissionRecord):
+        """Store a finished mission and update the statistics."""
+        _LOGGER.debug("Mission finished: %s", record)
+        self.day.add(record)
+        self.week.add(record)
+        self._update_region_durations(record)
+        self.hass.async_add_executor_job(self._append, record)
+        async_dispatcher_send(self.hass, self.signal)
+
+    def _update_region_durations(self, record: MissionRecord):
+        """Spread the duration of a room cleaning over its regions."""
+        if not record.regions or not record.duration or record.errors:
+            return
+        share = record.duration / len(record.regions)
+        for region in record.regions:
+            key = (record.pmap_id, region)
+            if (previous := self._region_durations.get(key)) is None:
+                self._region_durations[key] = share
+            else:
+                self._region_durations[key] = previous + REGION_DURATION_WEIGHT * (
+                    share - previous
+                )
+
+    @callback
+    def _async_expire(self, _now):
+        """Drop the missions that left the rolling windows."""
+        self.day.expire()
+        self.week.expire()
+        async_dispatcher_send(self.hass, self.signal)
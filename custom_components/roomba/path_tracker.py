@@ -0,0 +1,150 @@
+"""Simplified mission path of a robot with numbered deltas."""
+from __future__ import annotations
+
+from collections import deque
+import math
+import time
+from typing import Any, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .mission_history import IDLE_CYCLES
+from .state_monitor import RoombaStateMonitor
+
+PathListener = Callable[[dict[str, Any]], None]
+
+# Poses closer than this to the last path point (cm) do not extend the path
+MIN_SEGMENT = 5
+# Sine of the largest angle between two segments that are merged into one
+COLLINEAR_TOLERANCE = 0.05
+# Deltas kept for subscribers that resume after a disconnect
+DELTA_BUFFER = 1000
+
+PATH_APPEND = "append"
+PATH_REPLACE = "replace"
+
+
+def _collinear(first: list[int], second: list[int], third: list[int]) -> bool:
+    """Return True if third continues the segment from first to second."""
+    ax, ay = second[0] - first[0], second[1] - first[1]
+    bx, by = third[0] - second[0], third[1] - second[1]
+    lengths = math.hypot(ax, ay) * math.hypot(bx, by)
+    if not lengths or ax * bx + ay * by <= 0:
+        return False
+    return abs(ax * by - ay * bx) <= COLLINEAR_TOLERANCE * lengths
+
+
+class PathTracker:
+    """Follow the poses of a mission and keep a simplified path.
+
+    Points closer than MIN_SEGMENT are dropped and points continuing a
+    straight segment move its end instead of adding one. Every change is
+    numbered, so subscribers can resume from the last number they received
+    as long as it is still buffered.
+    """
+
+    def __init__(self, hass: HomeAssistant, blid: str, monitor: RoombaStateMonitor):
+        """Initialize the tracker."""
+        self.hass = hass
+        self.blid = blid
+        self.seq = 0
+        self.mission = ""
+        # Keeps versions unique across restarts, which start over at seq 0
+        self._epoch = int(time.time())
+        self.path: list[list[int]] = []
+        self.pose: list[int] | None = None
+        self._running = False
+        self._deltas: deque[dict[str, Any]] = deque(maxlen=DELTA_BUFFER)
+        self._listeners: list[PathListener] = []
+        state = monitor.reported_state
+        self._async_on_state(state, state)
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @callback
+    def async_shutdown(self):
+        """Stop following the robot."""
+        self._remove_listener()
+        self._listeners.clear()
+
+    @callback
+    def async_subscribe(self, listener: PathListener) -> CALLBACK_TYPE:
+        """Call listener with every delta, return a function to remove it."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    @property
+    def version(self) -> str:
+        """Return a version that changes with every delta."""
+        return f"{self._epoch:x}-{self.seq}"
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the whole path as of the current sequence number."""
+        return {
+            "seq": self.seq,
+            "mission": self.mission,
+            "running": self._running,
+            "pose": self.pose,
+            "path": list(self.path),
+        }
+
+    def deltas_since(self, seq: int, mission: str) -> list[dict[str, Any]] | None:
+        """Return the deltas after seq, None if they are no longer buffered."""
+        if mission != self.mission or seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._deltas or self._deltas[0]["seq"] > seq + 1:
+            return None
+        return [delta for delta in self._deltas if delta["seq"] > seq]
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Start a new path with every mission and follow the poses."""
+        if "cleanMissionStatus" in delta:
+            mission_state = state.get("cleanMissionStatus", {})
+            running = mission_state.get("cycle", "none") not in IDLE_CYCLES
+            if running and not self._running:
+                self.path = []
+                self.mission = str(mission_state.get("mssnStrtTm") or int(time.time()))
+                self._async_emit({"reset": self.mission})
+            self._running = running
+
+        if pose := delta.get("pose"):
+            point = pose.get("point", {})
+            x, y, theta = point.get("x"), point.get("y"), pose.get("theta")
+            if x is None or y is None:
+                return
+            self.pose = [x, y, theta]
+            message: dict[str, Any] = {"pose": self.pose}
+            if self._running and (action := self._extend_path([x, y])):
+                message["path"] = action
+            self._async_emit(message)
+
+    def _extend_path(self, point: list[int]) -> str | None:
+        """Add a point to the path, return how the path changed."""
+        path = self.path
+        if not path:
+            path.append(point)
+            return PATH_APPEND
+        if math.hypot(point[0] - path[-1][0], point[1] - path[-1][1]) < MIN_SEGMENT:
+            return None
+        if len(path) >= 2 and _collinear(path[-2], path[-1], point):
+            path[-1] = point
+            return PATH_REPLACE
+        path.append(point)
+        return PATH_APPEND
+
+    @callback
+    def _async_emit(self, message: dict[str, Any]):
+        """Number a delta, buffer it and pass it to the listeners."""
+        self.seq += 1
+        message["seq"] = self.seq
+        self._deltas.append(message)
+        for listener in list(self._listeners):
+            listener(message)
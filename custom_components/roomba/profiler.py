@@ -0,0 +1,135 @@
+"""Sample the stacks that run code of the integration."""
+from __future__ import annotations
+
+from collections import Counter
+import logging
+import os
+import sys
+import threading
+import time
+
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant, ServiceCall
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, SERVICE_PROFILE
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_DURATION = "duration"
+ATTR_INTERVAL = "interval"
+
+DEFAULT_DURATION = 30
+# Milliseconds between two samples
+DEFAULT_INTERVAL = 5
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+        vol.Optional(ATTR_INTERVAL, default=DEFAULT_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=1000)
+        ),
+    }
+)
+
+PACKAGE_DIR = os.path.dirname(__file__)
+
+
+def _frame_name(frame) -> str:
+    """Return the name of a stack frame in a folded stack."""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample all threads and count the stacks that pass through a directory.
+
+    Stacks are counted in the folded format read by flamegraph tools, one
+    line per stack with the frames from the root separated by semicolons.
+    """
+
+    def __init__(self, scope: str = PACKAGE_DIR):
+        """Initialize the profiler."""
+        self.scope = scope
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def sample(self):
+        """Count the current stack of every thread that runs code in scope."""
+        own_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if thread_id == own_thread:
+                continue
+            stack = []
+            in_scope = False
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                in_scope = in_scope or frame.f_code.co_filename.startswith(self.scope)
+                frame = frame.f_back
+            if in_scope:
+                self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, duration: float, interval: float):
+        """Sample for duration seconds, blocking the calling thread."""
+        deadline = time.monotonic() + duration
+        next_sample = time.monotonic()
+        while (now := time.monotonic()) < deadline:
+            self.sample()
+            next_sample = max(next_sample + interval, now)
+            time.sleep(max(0, next_sample - time.monotonic()))
+
+    def write(self, path: str):
+        """Write the folded stacks to path."""
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def async_setup_profiler_services(hass: HomeAssistant):
+    """Register the profile service."""
+
+    async def _async_profile(service_call: ServiceCall):
+        await async_profile(
+            hass,
+            service_call.data[ATTR_DURATION],
+            service_call.data[ATTR_INTERVAL] / 1000,
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_profile, schema=PROFILE_SCHEMA
+    )
+
+
+async def async_profile(hass: HomeAssistant, duration: float, interval: float):
+    """Profile the integration and write the stacks to the config directory."""
+    profiler = SamplingProfiler()
+    started = dt_util.now().strftime("%Y%m%d_%H%M%S")
+    path = hass.config.path(f"{DOMAIN}_profile_{started}.folded")
+
+    def _profile():
+        profiler.run(duration, interval)
+        profiler.write(path)
+
+    _LOGGER.info("Profiling %s for %s seconds", DOMAIN, duration)
+    await hass.async_add_executor_job(_profile)
+
+    in_scope = sum(profiler.stacks.values())
+    _LOGGER.info(
+        "Profile written to %s: %d stacks of %d samples in scope",
+        path,
+        in_scope,
+        profiler.samples,
+    )
+    persistent_notification.async_create(
+        hass,
+        f"Wrote {len(profiler.stacks)} distinct stacks ({in_scope} samples in "
+        f"{profiler.samples} sampling rounds) to `{path}`. The file uses the "
+        "folded stack format of flamegraph tools.",
+        title="Roomba profile",
+        notification_id=f"{DOMAIN}_profile",
+    )
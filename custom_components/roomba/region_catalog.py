@@ -0,0 +1,193 @@
+"""Catalog of the maps and regions known to a robot."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .state_monitor import RoombaStateMonitor
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+SIGNAL_REGIONS_UPDATED = "roomba_regions_updated_{}"
+
+REGION_TYPE_ROOM = "rid"
+
+
+def region_key(region_id: str, region_type: str) -> str:
+    """Return the key of a region within its map."""
+    return f"{region_type}:{region_id}"
+
+
+class RegionCatalog:
+    """Maps and regions learned from the commands the robot reports.
+
+    Every lastCommand that references a map adds the map and its regions, so
+    starting a room cleaning from the app is enough to make them known. Users
+    can name maps and regions, names are looked up through a dictionary.
+    """
+
+    def __init__(self, hass: HomeAssistant, blid: str, monitor: RoombaStateMonitor):
+        """Initialize the catalog."""
+        self.hass = hass
+        self.blid = blid
+        self._monitor = monitor
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.regions.{blid}")
+        self._pmaps: dict[str, dict[str, Any]] = {}
+        self._selected_pmap: str | None = None
+        self._pmap_names: dict[str, str] = {}
+        self._region_names: dict[tuple[str, str], dict[str, str]] = {}
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when the catalog changes."""
+        return SIGNAL_REGIONS_UPDATED.format(self.blid)
+
+    @property
+    def pmaps(self) -> dict[str, dict[str, Any]]:
+        """Return the known maps by id."""
+        return self._pmaps
+
+    @property
+    def selected_pmap(self) -> str | None:
+        """Return the map used when a cleaning does not name one."""
+        if self._selected_pmap in self._pmaps:
+            return self._selected_pmap
+        return next(iter(self._pmaps), None)
+
+    async def async_load(self):
+        """Load the catalog and learn from the current state."""
+        if data := await self._store.async_load():
+            self._pmaps = data.get("pmaps", {})
+            self._selected_pmap = data.get("selected_pmap")
+        self._async_rebuild_index()
+        state = self._monitor.reported_state
+        self._async_on_state(state, state)
+
+    @callback
+    def async_shutdown(self):
+        """Stop learning from the robot."""
+        self._remove_listener()
+
+    def pmap_name(self, pmap_id: str) -> str:
+        """Return the display name of a map."""
+        return self._pmaps.get(pmap_id, {}).get("name") or pmap_id
+
+    @callback
+    def async_select_pmap(self, pmap: str):
+        """Select the map used when a cleaning does not name one."""
+        self._selected_pmap = self.resolve_pmap(pmap)
+        self._async_changed()
+
+    @callback
+    def async_name_pmap(self, pmap: str, name: str | None):
+        """Name a map, None removes the name."""
+        pmap_id = self.resolve_pmap(pmap)
+        self._pmaps[pmap_id]["name"] = name or None
+        self._async_changed()
+
+    @callback
+    def async_name_region(
+        self, pmap: str, region_id: str, region_type: str, name: str | None
+    ):
+        """Name a region of a map, None removes the name."""
+        pmap_id = self.resolve_pmap(pmap)
+        regions = self._pmaps[pmap_id]["regions"]
+        region = regions.setdefault(
+            region_key(region_id, region_type),
+            {"region_id": region_id, "type": region_type},
+        )
+        region["name"] = name or None
+        self._async_changed()
+
+    def resolve_pmap(self, pmap: str | None) -> str:
+        """Return the id of a map given by id or name."""
+        if not pmap:
+            if (selected := self.selected_pmap) is None:
+                raise HomeAssistantError("No map is known for this robot yet")
+            return selected
+        if pmap in self._pmaps:
+            return pmap
+        if (pmap_id := self._pmap_names.get(pmap.casefold())) is not None:
+            return pmap_id
+        raise HomeAssistantError(f"Unknown map: {pmap}")
+
+    def resolve_region(self, pmap_id: str, region: Any) -> dict[str, str]:
+        """Return the region command parameters for a region id, name or dict."""
+        if isinstance(region, dict):
+            return region
+        region = str(region)
+        if (named := self._region_names.get((pmap_id, region.casefold()))) is not None:
+            return {"region_id": named["region_id"], "type": named["type"]}
+        if region.isdigit():
+            # A raw room id, as shown in the last command
+            return {"region_id": region, "type": REGION_TYPE_ROOM}
+        raise HomeAssistantError(f"Unknown region on map {pmap_id}: {region}")
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Learn maps and regions from the reported state."""
+        changed = False
+        for pmap in delta.get("pmaps") or []:
+            for pmap_id in pmap:
+                changed |= self._async_add_pmap(pmap_id)
+
+        last_command = delta.get("lastCommand") or {}
+        if pmap_id := last_command.get("pmap_id"):
+            changed |= self._async_add_pmap(pmap_id)
+            regions = self._pmaps[pmap_id]["regions"]
+            for region in last_command.get("regions") or []:
+                region_id = str(region.get("region_id"))
+                region_type = region.get("type", REGION_TYPE_ROOM)
+                key = region_key(region_id, region_type)
+                if key not in regions:
+                    regions[key] = {
+                        "region_id": region_id,
+                        "type": region_type,
+                        "name": None,
+                    }
+                    changed = True
+
+        if changed:
+            self._async_changed()
+
+    @callback
+    def _async_add_pmap(self, pmap_id: str) -> bool:
+        """Add a map, return True if it was not known yet."""
+        if pmap_id in self._pmaps:
+            return False
+        self._pmaps[pmap_id] = {"name": None, "regions": {}}
+        return True
+
+    @callback
+    def _async_changed(self):
+        """Rebuild the name index, save and notify."""
+        self._async_rebuild_index()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        async_dispatcher_send(self.hass, self.signal)
+
+    @callback
+    def _async_rebuild_index(self):
+        """Index maps and regions by name."""
+        self._pmap_names = {}
+        self._region_names = {}
+        for pmap_id, pmap in self._pmaps.items():
+            if pmap.get("name"):
+                self._pmap_names[pmap["name"].casefold()] = pmap_id
+            for region in pmap["regions"].values():
+                if region.get("name"):
+                    self._region_names[(pmap_id, region["name"].casefold())] = region
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {"pmaps": self._pmaps, "selected_pmap": self._selected_pmap}
@@ -0,0 +1,205 @@
+"""Rooms drawn as polygons in the YAML maps, and the room the robot is in."""
+from __future__ import annotations
+
+from collections import defaultdict
+import math
+import time
+from typing import Any, NamedTuple
+
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from roombapy import Roomba
+
+from .const import (
+    CONF_PMAP_ID,
+    CONF_REGION_ID,
+    CONF_REGION_TYPE,
+    CONF_ROOM_POINTS,
+    CONF_ROOMS,
+    DOMAIN,
+    ROOM_INDEXES,
+)
+from .mission_history import IDLE_CYCLES
+from .region_catalog import REGION_TYPE_ROOM, RegionCatalog, region_key
+from .state_monitor import RoombaStateMonitor
+
+SIGNAL_ROOM_CHANGED = "roomba_room_changed_{}"
+
+# Side of the grid cells the rooms are bucketed in (cm)
+GRID_CELL = 100
+# Gaps between poses longer than this (seconds) are not counted as dwell
+MAX_POSE_GAP = 30
+
+
+class Room(NamedTuple):
+    """A room polygon in reported coordinates."""
+
+    key: str
+    region_id: str
+    region_type: str
+    name: str | None
+    points: tuple[tuple[float, float], ...]
+    bounds: tuple[float, float, float, float]
+
+    @classmethod
+    def from_config(cls, conf_room: dict[str, Any]) -> Room:
+        """Return the room of a YAML rooms entry."""
+        points = tuple((float(x), float(y)) for x, y in conf_room[CONF_ROOM_POINTS])
+        xs, ys = [x for x, _ in points], [y for _, y in points]
+        region_type = conf_room.get(CONF_REGION_TYPE, REGION_TYPE_ROOM)
+        return cls(
+            region_key(conf_room[CONF_REGION_ID], region_type),
+            conf_room[CONF_REGION_ID],
+            region_type,
+            conf_room.get(CONF_NAME),
+            points,
+            (min(xs), min(ys), max(xs), max(ys)),
+        )
+
+    def contains(self, x: float, y: float) -> bool:
+        """Return True if the point is inside the polygon (even-odd rule)."""
+        min_x, min_y, max_x, max_y = self.bounds
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        inside = False
+        points = self.points
+        x1, y1 = points[-1]
+        for x2, y2 in points:
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+            x1, y1 = x2, y2
+        return inside
+
+
+class RoomIndex:
+    """Rooms of a map bucketed in a grid, to find the room of a pose fast.
+
+    Each cell lists the rooms whose bounds overlap it, so a lookup tests
+    the one or two polygons near the pose instead of all of them.
+    """
+
+    def __init__(self, rooms: list[Room], cell: int = GRID_CELL):
+        """Bucket the rooms."""
+        self.rooms = rooms
+        self._cell = cell
+        buckets: defaultdict[tuple[int, int], list[Room]] = defaultdict(list)
+        for room in rooms:
+            min_x, min_y, max_x, max_y = room.bounds
+            for cell_x in range(self._cell_of(min_x), self._cell_of(max_x) + 1):
+                for cell_y in range(self._cell_of(min_y), self._cell_of(max_y) + 1):
+                    buckets[(cell_x, cell_y)].append(room)
+        self._buckets = {cell: tuple(rooms) for cell, rooms in buckets.items()}
+
+    def _cell_of(self, value: float) -> int:
+        return math.floor(value / self._cell)
+
+    def locate(self, x: float, y: float) -> Room | None:
+        """Return the room containing the point, None outside of all rooms."""
+        for room in self._buckets.get((self._cell_of(x), self._cell_of(y)), ()):
+            if room.contains(x, y):
+                return room
+        return None
+
+
+def build_room_indexes(maps: list[dict[str, Any]] | None) -> dict[str, RoomIndex]:
+    """Return the room index of every YAML maps entry with rooms by pmap id."""
+    return {
+        conf_map[CONF_PMAP_ID]: RoomIndex(
+            [Room.from_config(conf_room) for conf_room in conf_map[CONF_ROOMS]]
+        )
+        for conf_map in maps or []
+        if conf_map.get(CONF_ROOMS)
+    }
+
+
+class RoomTracker:
+    """Follow the room the robot is in and the time spent per room.
+
+    Dwell times start over with every mission. Listeners are only notified
+    when the room changes, not on every pose.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        roomba: Roomba,
+        blid: str,
+        monitor: RoombaStateMonitor,
+        catalog: RegionCatalog,
+    ):
+        """Initialize the tracker."""
+        self.hass = hass
+        self.blid = blid
+        self.room: Room | None = None
+        self.pmap_id: str | None = None
+        self.dwell: dict[str, float] = {}
+        self._roomba = roomba
+        self._catalog = catalog
+        self._running = False
+        self._last_pose: float | None = None
+        state = monitor.reported_state
+        self._async_on_state(state, state)
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when the room changes."""
+        return SIGNAL_ROOM_CHANGED.format(self.blid)
+
+    @callback
+    def async_shutdown(self):
+        """Stop following the robot."""
+        self._remove_listener()
+
+    def room_name(self, room: Room | None) -> str | None:
+        """Return the display name of a room."""
+        if room is None:
+            return None
+        if room.name:
+            return room.name
+        region = self._catalog.pmaps.get(self.pmap_id, {}).get("regions", {})
+        return region.get(room.key, {}).get("name") or room.region_id
+
+    def dwell_by_name(self) -> dict[str, int]:
+        """Return the seconds spent per room in the mission, by room name."""
+        index = self.hass.data[DOMAIN][ROOM_INDEXES].get(self.pmap_id)
+        rooms = {room.key: room for room in index.rooms} if index else {}
+        return {
+            self.room_name(rooms[key]) if key in rooms else key: round(seconds)
+            for key, seconds in self.dwell.items()
+        }
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Reset dwell times with every mission and locate the poses."""
+        if "cleanMissionStatus" in delta:
+            mission_state = state.get("cleanMissionStatus", {})
+            running = mission_state.get("cycle", "none") not in IDLE_CYCLES
+            if running and not self._running:
+                self.dwell = {}
+                self._last_pose = None
+            if running != self._running:
+                self._running = running
+                async_dispatcher_send(self.hass, self.signal)
+
+        if not (pose := delta.get("pose")):
+            return
+        point = pose.get("point", {})
+        x, y = point.get("x"), point.get("y")
+        if x is None or y is None:
+            return
+
+        now = time.monotonic()
+        if self._running and self.room and self._last_pose is not None:
+            elapsed = now - self._last_pose
+            if elapsed <= MAX_POSE_GAP:
+                self.dwell[self.room.key] = self.dwell.get(self.room.key, 0) + elapsed
+        self._last_pose = now
+
+        self.pmap_id = self._roomba.current_pmap_id
+        index = self.hass.data[DOMAIN][ROOM_INDEXES].get(self.pmap_id)
+        room = index.locate(x, y) if index else None
+        if room != self.room:
+            self.room = room
+            async_dispatcher_send(self.hass, self.signal)
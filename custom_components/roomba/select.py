@@ -0,0 +1,83 @@
+"""Select the map used for room cleaning."""
+from homeassistant.components.select import SelectEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import BLID, DOMAIN, REGION_CATALOG, ROOMBA_SESSION
+from .irobot_base import IRobotEntity
+from .region_catalog import RegionCatalog
+
+ATTR_PMAP_ID = "pmap_id"
+ATTR_REGIONS = "regions"
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the iRobot Roomba map selection."""
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    roomba = domain_data[ROOMBA_SESSION]
+    blid = domain_data[BLID]
+    catalog = domain_data[REGION_CATALOG]
+
+    async_add_entities([RoombaMapSelect(roomba, blid, catalog)], True)
+
+
+class RoombaMapSelect(IRobotEntity, SelectEntity):
+    """Map used by clean_rooms, with the known regions as attributes."""
+
+    ICON = "mdi:floor-plan"
+
+    def __init__(self, roomba, blid, catalog: RegionCatalog):
+        """Initialize the map selection."""
+        super().__init__(roomba, blid)
+        self._catalog = catalog
+
+    @property
+    def name(self):
+        """Return the name of the entity."""
+        return f"{self._name} Map"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this entity."""
+        return f"pmap_{self._blid}"
+
+    @property
+    def icon(self):
+        """Return the icon of this entity."""
+        return self.ICON
+
+    @property
+    def options(self):
+        """Return the known maps."""
+        return [self._catalog.pmap_name(pmap_id) for pmap_id in self._catalog.pmaps]
+
+    @property
+    def current_option(self):
+        """Return the selected map."""
+        if (pmap_id := self._catalog.selected_pmap) is None:
+            return None
+        return self._catalog.pmap_name(pmap_id)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the regions of the selected map."""
+        if (pmap_id := self._catalog.selected_pmap) is None:
+            return {}
+        regions = self._catalog.pmaps[pmap_id]["regions"]
+        return {
+            ATTR_PMAP_ID: pmap_id,
+            ATTR_REGIONS: {
+                key: region.get("name") for key, region in regions.items()
+            },
+        }
+
+    async def async_select_option(self, option):
+        """Select the map used when a cleaning does not name one."""
+        self._catalog.async_select_pmap(option)
+
+    async def async_added_to_hass(self):
+        """Update when the catalog changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._catalog.signal, self.async_write_ha_state
+            )
+        )
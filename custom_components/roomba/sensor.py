@@ -1,12 +1,40 @@
 """Sensor for checking the battery level of Roomba."""
-from homeassistant.components.sensor import SensorEntity
+import time
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.components.vacuum import STATE_DOCKED
-from homeassistant.const import DEVICE_CLASS_BATTERY, PERCENTAGE
+from homeassistant.const import (
+    AREA_SQUARE_METERS,
+    DEGREE,
+    DEVICE_CLASS_BATTERY,
+    LENGTH_CENTIMETERS,
+    PERCENTAGE,
+    TIME_MINUTES,
+)
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.icon import icon_for_battery_level
 
 from . import roomba_reported_state
-from .const import BLID, DOMAIN, ROOMBA_SESSION
-from .irobot_base import IRobotEntity
+from .const import (
+    BLID,
+    CONF_POSITION_INTERVAL,
+    DEFAULT_POSITION_INTERVAL,
+    DIRT_HOTSPOTS,
+    DOMAIN,
+    MISSION_HISTORY,
+    ROOM_TRACKER,
+    ROOMBA_SESSION,
+    SIGNAL_OPTIONS_UPDATED,
+    STATE_MONITOR,
+)
+from .dirt_hotspots import DirtHotspots
+from .irobot_base import IRobotEntity, total_statistics
+from .mission_history import MissionHistory
+from .room_index import RoomTracker
+from .state_monitor import RoombaStateMonitor
 
 CLEAN_BASE_STATE_MAP = {
     300: "Ready",
@@ -28,17 +56,59 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     domain_data = hass.data[DOMAIN][config_entry.entry_id]
     roomba = domain_data[ROOMBA_SESSION]
     blid = domain_data[BLID]
+    history = domain_data[MISSION_HISTORY]
+    monitor = domain_data[STATE_MONITOR]
 
     entities = []
 
     # add the battery
     entities.append(RoombaBattery(roomba, blid))
 
+    # add the rolling mission statistics
+    entities.extend(
+        constructor(roomba, blid, history)
+        for constructor in (
+            CleanedAreaPerDay,
+            MissionsPerWeek,
+            MeanMissionDuration,
+            MissionErrorRate,
+        )
+    )
+
+    # add the lifetime totals and the last command
+    entities.extend(
+        constructor(roomba, blid)
+        for constructor in (
+            TotalCleaningTime,
+            TotalCleanedArea,
+            TotalMissions,
+            TotalDirtEvents,
+            TotalEvacs,
+            LastCommand,
+        )
+    )
+
     #if we have a clean base, add it too
     state = roomba_reported_state(roomba)
     if clean_base := state.get("dock", {}):
         entities.append(CleanBase(roomba, blid))
 
+    # Not all Roombas expose position data
+    # https://github.com/koalazak/dorita980/issues/48
+    if state.get("cap", {}).get("pose") == 1:
+        interval = config_entry.options.get(
+            CONF_POSITION_INTERVAL, DEFAULT_POSITION_INTERVAL
+        )
+        entities.extend(
+            constructor(roomba, blid, monitor, config_entry.entry_id, interval)
+            for constructor in (PositionX, PositionY, PositionTheta)
+        )
+        rooms = domain_data[ROOM_TRACKER]
+        entities.append(CurrentRoom(roomba, blid, rooms))
+        entities.append(
+            DirtHotspotRooms(roomba, blid, domain_data[DIRT_HOTSPOTS], rooms)
+        )
+
     async_add_entities(entities, True)
 
 class RoombaBattery(IRobotEntity, SensorEntity):
@@ -120,4 +190,462 @@ class CleanBase(IRobotEntity, SensorEntity):
 
     def new_state_filter(self, new_state):
         """Filter the new state."""
-        return "dock" in new_state        
\ No newline at end of file
+        return "dock" in new_state
+
+
+class MissionStatistic(IRobotEntity, SensorEntity):
+    """Base class for statistics over the recent missions."""
+
+    _key = None
+    _label = None
+
+    def __init__(self, roomba, blid, history: MissionHistory):
+        """Initialize the statistic."""
+        super().__init__(roomba, blid)
+        self._history = history
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self._label}"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"{self._key}_{self._blid}"
+
+    async def async_added_to_hass(self):
+        """Update when a mission is recorded."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._history.signal, self.async_write_ha_state
+            )
+        )
+
+
+class CleanedAreaPerDay(MissionStatistic):
+    """Area cleaned over the last 24 hours."""
+
+    _key = "area_per_day"
+    _label = "Cleaned Area (24h)"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return AREA_SQUARE_METERS if self.hass.config.units.is_metric else "ft²"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        area = self._history.day.area
+        if self.hass.config.units.is_metric:
+            return round(area * 0.0929)
+        return area
+
+
+class MissionsPerWeek(MissionStatistic):
+    """Missions finished over the last 7 days."""
+
+    _key = "missions_per_week"
+    _label = "Missions (7d)"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._history.week.count
+
+
+class MeanMissionDuration(MissionStatistic):
+    """Mean duration of the missions over the last 7 days."""
+
+    _key = "mean_mission_duration"
+    _label = "Mean Mission Duration (7d)"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return TIME_MINUTES
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        week = self._history.week
+        if not week.count:
+            return None
+        return round(week.duration / week.count)
+
+
+class MissionErrorRate(MissionStatistic):
+    """Share of the missions over the last 7 days that reported an error."""
+
+    _key = "mission_error_rate"
+    _label = "Mission Error Rate (7d)"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return PERCENTAGE
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        week = self._history.week
+        if not week.count:
+            return None
+        return round(100 * week.failed / week.count)
+
+
+class TotalStatistic(IRobotEntity, SensorEntity):
+    """Base class for the lifetime totals reported by the robot."""
+
+    _key = None
+    _label = None
+    _index = None
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self._label}"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"{self._key}_{self._blid}"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return total_statistics(self.vacuum_state)[self._index]
+
+    def new_state_filter(self, new_state):
+        """Totals only change with the bbrun report."""
+        return "bbrun" in new_state
+
+
+class TotalCleaningTime(TotalStatistic):
+    """Lifetime cleaning time."""
+
+    _key = "total_cleaning_time"
+    _label = "Total Cleaning Time"
+    _index = 0
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return TIME_MINUTES
+
+
+class TotalCleanedArea(TotalStatistic):
+    """Lifetime cleaned area."""
+
+    _key = "total_cleaned_area"
+    _label = "Total Cleaned Area"
+    _index = 1
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return AREA_SQUARE_METERS if self.hass.config.units.is_metric else "ft²"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        area = super().native_value
+        if self.hass.config.units.is_metric:
+            return round(area * 0.0929)
+        return area
+
+
+class TotalMissions(TotalStatistic):
+    """Lifetime number of missions."""
+
+    _key = "total_jobs"
+    _label = "Total Missions"
+    _index = 2
+
+
+class TotalDirtEvents(TotalStatistic):
+    """Lifetime number of dirt detections."""
+
+    _key = "total_dirt_events"
+    _label = "Total Dirt Events"
+    _index = 3
+
+
+class TotalEvacs(TotalStatistic):
+    """Lifetime number of bin evacuations at the clean base."""
+
+    _key = "total_evacs"
+    _label = "Total Evacs"
+    _index = 4
+
+
+class LastCommand(IRobotEntity, SensorEntity):
+    """The last command the robot received, to help identifying rooms/zones."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} Last Command"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"last_command_{self._blid}"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return (self.vacuum_state.get("lastCommand") or {}).get("command")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the parameters of the command, like the map and regions."""
+        last_command = self.vacuum_state.get("lastCommand") or {}
+        return {key: value for key, value in last_command.items() if key != "command"}
+
+    def new_state_filter(self, new_state):
+        """Only follow lastCommand reports."""
+        return "lastCommand" in new_state
+
+
+class RoombaPosition(IRobotEntity, SensorEntity):
+    """Base class for the coordinates of the robot on its map.
+
+    Poses arrive several times per second while cleaning, the state is
+    written at most once per interval and once more after the last pose.
+    """
+
+    _key = None
+    _label = None
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, roomba, blid, monitor: RoombaStateMonitor, entry_id, interval
+    ):
+        """Initialize the position sensor."""
+        super().__init__(roomba, blid)
+        self._monitor = monitor
+        self._entry_id = entry_id
+        self._interval = interval
+        self._last_write = 0.0
+        self._cancel_write: CALLBACK_TYPE | None = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self._label}"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"{self._key}_{self._blid}"
+
+    @property
+    def _pose(self):
+        return self.vacuum_state.get("pose") or {}
+
+    async def async_added_to_hass(self):
+        """Follow poses and the position interval option."""
+        self.async_on_remove(self._monitor.async_add_listener(self._async_on_state))
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_OPTIONS_UPDATED.format(self._entry_id),
+                self._async_options_updated,
+            )
+        )
+        self.async_on_remove(self._async_cancel_write)
+
+    @callback
+    def _async_options_updated(self, options):
+        """Apply a new position interval."""
+        self._interval = options.get(CONF_POSITION_INTERVAL, DEFAULT_POSITION_INTERVAL)
+
+    @callback
+    def _async_on_state(self, state, delta):
+        """Write the new position unless the last write was too recent."""
+        if "pose" not in delta or self._cancel_write:
+            return
+        delay = self._last_write + self._interval - time.monotonic()
+        if delay <= 0:
+            self._async_write()
+        else:
+            self._cancel_write = async_call_later(self.hass, delay, self._async_write)
+
+    @callback
+    def _async_write(self, _now=None):
+        self._cancel_write = None
+        self._last_write = time.monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_write(self):
+        if self._cancel_write:
+            self._cancel_write()
+            self._cancel_write = None
+
+
+class PositionX(RoombaPosition):
+    """X coordinate of the robot."""
+
+    _key = "position_x"
+    _label = "Position X"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return LENGTH_CENTIMETERS
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._pose.get("point", {}).get("x")
+
+
+class PositionY(RoombaPosition):
+    """Y coordinate of the robot."""
+
+    _key = "position_y"
+    _label = "Position Y"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return LENGTH_CENTIMETERS
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._pose.get("point", {}).get("y")
+
+
+class PositionTheta(RoombaPosition):
+    """Heading of the robot."""
+
+    _key = "position_theta"
+    _label = "Position Theta"
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit_of_measurement of the device."""
+        return DEGREE
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._pose.get("theta")
+
+
+class CurrentRoom(IRobotEntity, SensorEntity):
+    """Room the robot is in, from the room polygons of the YAML maps.
+
+    The attributes hold the time spent per room during the mission, they
+    are refreshed when the robot moves to another room.
+    """
+
+    _attr_icon = "mdi:floor-plan"
+
+    def __init__(self, roomba, blid, tracker: RoomTracker):
+        """Initialize the sensor."""
+        super().__init__(roomba, blid)
+        self._tracker = tracker
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} Current Room"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"current_room_{self._blid}"
+
+    @property
+    def native_value(self):
+        """Return the name of the room."""
+        return self._tracker.room_name(self._tracker.room)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the region of the room and the dwell times."""
+        room = self._tracker.room
+        return {
+            "pmap_id": self._tracker.pmap_id,
+            "region_id": room.region_id if room else None,
+            "region_type": room.region_type if room else None,
+            "dwell_seconds": self._tracker.dwell_by_name(),
+        }
+
+    async def async_added_to_hass(self):
+        """Update when the room changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._tracker.signal, self.async_write_ha_state
+            )
+        )
+
+
+class DirtHotspotRooms(IRobotEntity, SensorEntity):
+    """Rooms of the current map ranked by recent dirt detections.
+
+    The state is the dirtiest room, the attributes list all rooms with
+    dirt as regions for the clean_rooms service, dirtiest first.
+    """
+
+    _attr_icon = "mdi:texture-box"
+
+    def __init__(self, roomba, blid, hotspots: DirtHotspots, rooms: RoomTracker):
+        """Initialize the sensor."""
+        super().__init__(roomba, blid)
+        self._hotspots = hotspots
+        self._rooms = rooms
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} Dirt Hotspot"
+
+    @property
+    def unique_id(self):
+        """Return the ID of this sensor."""
+        return f"dirt_hotspot_{self._blid}"
+
+    @property
+    def _ranked(self):
+        return self._hotspots.ranked_rooms(self.vacuum.current_pmap_id)
+
+    @property
+    def native_value(self):
+        """Return the name of the dirtiest room."""
+        if ranked := self._ranked:
+            return self._rooms.room_name(ranked[0][0])
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the ranked regions."""
+        return {
+            "pmap_id": self.vacuum.current_pmap_id,
+            "regions": [
+                {
+                    "region_id": room.region_id,
+                    "type": room.region_type,
+                    "name": self._rooms.room_name(room),
+                    "score": round(score, 2),
+                }
+                for room, score in self._ranked
+            ],
+        }
+
+    async def async_added_to_hass(self):
+        """Update when dirt is detected."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._hotspots.signal, self.async_write_ha_state
+            )
+        )
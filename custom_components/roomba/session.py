@@ -0,0 +1,160 @@
+"""Adaptive MQTT session handling for iRobot devices."""
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+
+from roombapy import Roomba, RoombaConnectionError
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .state_monitor import RoombaStateMonitor
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often an idle robot is asked for its state
+IDLE_REFRESH_INTERVAL = timedelta(minutes=5)
+# How long the robot has to stay docked and charged before going idle
+IDLE_GRACE_PERIOD = 60
+# Seconds to wait for the state of an idle robot after connecting
+REFRESH_TIMEOUT = 10
+
+
+def is_docked_and_charged(reported_state: dict) -> bool:
+    """Return True if the robot sits on its dock with a full battery."""
+    mission = reported_state.get("cleanMissionStatus", {})
+    return (
+        mission.get("phase") == "charge"
+        and mission.get("cycle", "none") == "none"
+        and (reported_state.get("batPct") or 0) >= 100
+    )
+
+
+class RoombaSessionManager:
+    """Switch between a continuous session and low-traffic refreshes.
+
+    In adaptive mode the MQTT session is closed while the robot is docked and
+    charged, and the state is refreshed every IDLE_REFRESH_INTERVAL. The
+    session goes back to continuous streaming as soon as a refresh shows a
+    mission, or a command is about to be sent.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, roomba: Roomba, monitor: RoombaStateMonitor
+    ):
+        """Initialize the session manager."""
+        self.hass = hass
+        self.roomba = roomba
+        self.monitor = monitor
+        self.adaptive = False
+        self.idle = False
+        self._message_count = 0
+        self._cancel_grace: CALLBACK_TYPE | None = None
+        self._cancel_refresh: CALLBACK_TYPE | None = None
+        self._remove_listener = monitor.async_add_listener(self._async_on_state)
+
+    @callback
+    def async_set_adaptive(self, adaptive: bool):
+        """Turn adaptive mode on or off."""
+        if adaptive == self.adaptive:
+            return
+        self.adaptive = adaptive
+        if adaptive:
+            self._async_on_state(self.monitor.reported_state, {})
+        else:
+            self._async_cancel_grace()
+            if self.idle:
+                self.hass.async_create_task(self.async_ensure_connected())
+
+    @callback
+    def async_apply_options(self, delay: int, adaptive: bool):
+        """Apply the connection options to the live session.
+
+        Switching between continuous and periodic connections needs a new
+        session, the entry is reloaded for that instead.
+        """
+        self.roomba.delay = delay
+        self.async_set_adaptive(adaptive)
+
+    async def async_ensure_connected(self):
+        """Go back to a continuous session if the robot is idle."""
+        if not self.idle:
+            return
+        _LOGGER.debug("Resuming continuous session with the robot")
+        self._async_stop_refresh()
+        self.idle = False
+        await self._async_connect()
+
+    async def async_shutdown(self):
+        """Cancel the pending timers."""
+        self._async_cancel_grace()
+        self._async_stop_refresh()
+        self._remove_listener()
+
+    @callback
+    def _async_on_state(self, state: dict, delta: dict):
+        """Schedule the idle mode while the robot stays docked and charged."""
+        self._message_count += 1
+        if not self.adaptive or self.idle:
+            return
+        if not is_docked_and_charged(state):
+            self._async_cancel_grace()
+        elif self._cancel_grace is None:
+            self._cancel_grace = async_call_later(
+                self.hass, IDLE_GRACE_PERIOD, self._async_go_idle
+            )
+
+    async def _async_go_idle(self, _now):
+        """Close the session and switch to periodic refreshes."""
+        self._cancel_grace = None
+        if not self.adaptive or not is_docked_and_charged(self.monitor.reported_state):
+            return
+        _LOGGER.debug("Robot is docked and charged, switching to idle refreshes")
+        self.idle = True
+        await self.hass.async_add_executor_job(self.roomba.disconnect)
+        self._cancel_refresh = async_track_time_interval(
+            self.hass, self._async_refresh, IDLE_REFRESH_INTERVAL
+        )
+
+    async def _async_refresh(self, _now):
+        """Fetch the state of an idle robot."""
+        received = self._message_count
+        if not await self._async_connect():
+            return
+        await self.monitor.async_wait_for_state(
+            lambda _: self._message_count > received, REFRESH_TIMEOUT
+        )
+        if not self.idle:
+            # A command was issued while refreshing
+            return
+        if is_docked_and_charged(self.monitor.reported_state):
+            await self.hass.async_add_executor_job(self.roomba.disconnect)
+            return
+        _LOGGER.debug("Robot left the dock, resuming continuous session")
+        self._async_stop_refresh()
+        self.idle = False
+
+    async def _async_connect(self) -> bool:
+        """Open the MQTT session."""
+        try:
+            await self.hass.async_add_executor_job(self.roomba.connect)
+        except RoombaConnectionError as err:
+            _LOGGER.debug("Error connecting to the robot: %s", err)
+            return False
+        return True
+
+    @callback
+    def _async_cancel_grace(self):
+        """Cancel the pending switch to idle mode."""
+        if self._cancel_grace:
+            self._cancel_grace()
+            self._cancel_grace = None
+
+    @callback
+    def _async_stop_refresh(self):
+        """Stop the periodic refreshes."""
+        if self._cancel_refresh:
+            self._cancel_refresh()
+            self._cancel_refresh = None
+
@@ -0,0 +1,100 @@
+"""Dispatch reported state changes of an iRobot device on the event loop."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+import async_timeout
+from roombapy import Roomba
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+StatePredicate = Callable[[dict], bool]
+StateListener = Callable[[dict, dict], None]
+
+
+class RoombaStateMonitor:
+    """Hand the messages of one robot over to the event loop.
+
+    Listeners are called with the full reported state and the reported part
+    of the message that changed it. Waiters are resolved as soon as the
+    reported state satisfies their predicate.
+    """
+
+    def __init__(self, hass: HomeAssistant, roomba: Roomba):
+        """Initialize the monitor."""
+        self.hass = hass
+        self.roomba = roomba
+        self._listeners: list[StateListener] = []
+        self._waiters: list[tuple[StatePredicate, asyncio.Future]] = []
+        roomba.register_on_message_callback(self._on_message)
+
+    @property
+    def reported_state(self) -> dict:
+        """Return the reported state of the robot."""
+        return self.roomba.master_state.get("state", {}).get("reported", {})
+
+    @callback
+    def async_add_listener(self, listener: StateListener) -> CALLBACK_TYPE:
+        """Call listener on every message, return a function to remove it."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    async def async_wait_for_state(
+        self, predicate: StatePredicate, timeout: float
+    ) -> bool:
+        """Wait until the reported state matches predicate.
+
+        Returns False if the robot did not get there within timeout seconds.
+        """
+        if predicate(self.reported_state):
+            return True
+
+        waiter = self.hass.loop.create_future()
+        entry = (predicate, waiter)
+        self._waiters.append(entry)
+        try:
+            async with async_timeout.timeout(timeout):
+                return await waiter
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+
+    @callback
+    def async_shutdown(self):
+        """Release everyone still waiting."""
+        for _, waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+        self._waiters.clear()
+        self._listeners.clear()
+
+    def _on_message(self, json_data):
+        """Handle a message (called from the MQTT thread)."""
+        self.hass.loop.call_soon_threadsafe(self._async_handle_message, json_data)
+
+    @callback
+    def _async_handle_message(self, json_data):
+        """Notify listeners and resolve matching waiters."""
+        delta = json_data.get("state", {}).get("reported", {})
+        state = self.reported_state
+        for listener in list(self._listeners):
+            try:
+                listener(state, delta)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling message from the robot")
+
+        for predicate, waiter in list(self._waiters):
+            if not waiter.done() and predicate(state):
+                waiter.set_result(True)
@@ -1,7 +1,21 @@
 """Support for Wi-Fi enabled iRobot Roombas."""
 from . import roomba_reported_state
 from .braava import BraavaJet
-from .const import BLID, DOMAIN, ROOMBA_SESSION, SERVICE_CLEAN_ROOMS
+from .const import (
+    BLID,
+    COMMAND_QUEUE,
+    DOMAIN,
+    REGION_CATALOG,
+    ROOMBA_SESSION,
+    SERVICE_CLEAN_ROOMS,
+    SERVICE_CLEAR_JOBS,
+    SERVICE_ENQUEUE_JOB,
+    SERVICE_NAME_MAP,
+    SERVICE_NAME_REGION,
+    VACUUM_ENTITY,
+)
+from .job_queue import DEFAULT_MIN_BATTERY, JOB_CLEAN_ROOMS, JOB_COMMANDS
+from .region_catalog import REGION_TYPE_ROOM
 from .roomba import RoombaVacuum, RoombaVacuumCarpetBoost
 from homeassistant.helpers import entity_platform
 
@@ -10,12 +24,20 @@ import homeassistant.helpers.config_validation as cv
 
 ATTR_PMAP = "pmap"
 ATTR_REGIONS = "regions"
+ATTR_REGION_ID = "region_id"
+ATTR_REGION_TYPE = "type"
+ATTR_NAME = "name"
+ATTR_COMMAND = "command"
+ATTR_FAN_SPEED = "fan_speed"
+ATTR_MIN_BATTERY = "min_battery"
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the iRobot Roomba vacuum cleaner."""
     domain_data = hass.data[DOMAIN][config_entry.entry_id]
     roomba = domain_data[ROOMBA_SESSION]
     blid = domain_data[BLID]
+    command_queue = domain_data[COMMAND_QUEUE]
+    catalog = domain_data[REGION_CATALOG]
 
     # Get the platform
     platform = entity_platform.async_get_current_platform()
@@ -32,7 +54,8 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     else:
         constructor = RoombaVacuum
 
-    roomba_vac = constructor(roomba, blid)
+    roomba_vac = constructor(roomba, blid, command_queue, catalog)
+    domain_data[VACUUM_ENTITY] = roomba_vac
     async_add_entities([roomba_vac], True)
 
     platform.async_register_entity_service(
@@ -43,8 +66,46 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     },
     clean_rooms)
 
+    platform.async_register_entity_service(
+        SERVICE_NAME_MAP,
+        {
+            vol.Required(ATTR_PMAP): cv.string,
+            vol.Optional(ATTR_NAME): cv.string,
+        },
+        "async_name_map",
+    )
+
+    platform.async_register_entity_service(
+        SERVICE_NAME_REGION,
+        {
+            vol.Optional(ATTR_PMAP): cv.string,
+            vol.Required(ATTR_REGION_ID): cv.string,
+            vol.Optional(ATTR_REGION_TYPE, default=REGION_TYPE_ROOM): vol.In(
+                ["rid", "zid"]
+            ),
+            vol.Optional(ATTR_NAME): cv.string,
+        },
+        "async_name_region",
+    )
+
+    platform.async_register_entity_service(
+        SERVICE_ENQUEUE_JOB,
+        {
+            vol.Optional(ATTR_COMMAND, default=JOB_CLEAN_ROOMS): vol.In(JOB_COMMANDS),
+            vol.Optional(ATTR_PMAP): cv.string,
+            vol.Optional(ATTR_REGIONS): cv.ensure_list,
+            vol.Optional(ATTR_FAN_SPEED): cv.string,
+            vol.Optional(ATTR_MIN_BATTERY, default=DEFAULT_MIN_BATTERY): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+        },
+        "async_enqueue_job",
+    )
+
+    platform.async_register_entity_service(SERVICE_CLEAR_JOBS, {}, "async_clear_jobs")
+
 
 async def clean_rooms(entity, service_call):
     await entity.async_clean_rooms(
         service_call.data.get(ATTR_PMAP,None), 
-        service_call.data[ATTR_REGIONS])    
+        service_call.data[ATTR_REGIONS])
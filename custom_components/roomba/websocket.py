@@ -0,0 +1,69 @@
+"""Websocket API to follow the path of a robot."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BLID, DOMAIN, PATH_TRACKER
+from .path_tracker import PathTracker
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant):
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe_path)
+
+
+@callback
+def async_get_domain_data(hass: HomeAssistant, blid: str) -> dict[str, Any] | None:
+    """Return the shared objects of the robot with blid."""
+    for domain_data in hass.data.get(DOMAIN, {}).values():
+        if isinstance(domain_data, dict) and domain_data.get(BLID) == blid:
+            return domain_data
+    return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "roomba/subscribe_path",
+        vol.Required("blid"): str,
+        vol.Optional("mission"): str,
+        vol.Optional("since"): int,
+    }
+)
+@callback
+def websocket_subscribe_path(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+):
+    """Stream pose and path deltas of a robot.
+
+    The first event is a snapshot of the simplified path, unless the client
+    passes the mission and sequence number it last received and the deltas
+    since then are still buffered.
+    """
+    if (domain_data := async_get_domain_data(hass, msg["blid"])) is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown robot")
+        return
+    tracker: PathTracker = domain_data[PATH_TRACKER]
+
+    @callback
+    def _async_forward(delta: dict[str, Any]):
+        connection.send_message(websocket_api.event_message(msg["id"], delta))
+
+    connection.subscriptions[msg["id"]] = tracker.async_subscribe(_async_forward)
+    connection.send_result(msg["id"])
+
+    deltas = None
+    if "since" in msg and "mission" in msg:
+        deltas = tracker.deltas_since(msg["since"], msg["mission"])
+    if deltas is None:
+        _async_forward({"snapshot": tracker.snapshot()})
+        return
+    for delta in deltas:
+        _async_forward(delta)
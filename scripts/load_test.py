@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""Measure how the integration scales with the number of robots.
+
+For every robot count a simulator with that many robots is started (see
+roomba_simulator.py) and a Home Assistant instance is bootstrapped in a
+temporary config directory with one config entry per robot. Every count runs
+in its own process so that memory figures do not carry over.
+
+Measured are the setup and teardown time of all entries, the memory per
+robot, and the event loop lag and state writes per second while the robots
+are docked and while all of them clean.
+
+    python scripts/load_test.py --robots 1,10,50 --duration 60
+
+Requires Home Assistant and the requirements of the integration.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR = os.path.join(SCRIPTS_DIR, "roomba_simulator.py")
+INTEGRATION_DIR = os.path.join(
+    os.path.dirname(SCRIPTS_DIR), "custom_components", "roomba"
+)
+DOMAIN = "roomba"
+
+CONFIGURATION = """\
+homeassistant:
+  name: Roomba load test
+  latitude: 0
+  longitude: 0
+  elevation: 0
+  unit_system: metric
+  time_zone: UTC
+
+logger:
+  default: warning
+"""
+
+# Seconds between two loop lag samples
+LAG_INTERVAL = 0.05
+
+
+def rss_bytes() -> int:
+    """Return the resident memory of this process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak instead of current memory, in kilobytes on Linux, bytes on macOS
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class LoopLagMonitor:
+    """Sample how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        """Initialize the monitor."""
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Start sampling, dropping earlier samples."""
+        self.samples = []
+        self._task = asyncio.create_task(self._async_run())
+
+    def stop(self) -> dict[str, float]:
+        """Stop sampling and return lag percentiles in milliseconds."""
+        self._task.cancel()
+        samples = sorted(self.samples) or [0.0]
+        return {
+            "lag_p50_ms": round(statistics.median(samples) * 1000, 2),
+            "lag_p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 2),
+            "lag_max_ms": round(samples[-1] * 1000, 2),
+        }
+
+    async def _async_run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+
+async def async_measure_window(hass, seconds: float) -> dict[str, float]:
+    """Return loop lag and state writes per second over a window."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.const import EVENT_STATE_CHANGED
+
+    writes = 0
+
+    def _count(_event):
+        nonlocal writes
+        writes += 1
+
+    remove = hass.bus.async_listen(EVENT_STATE_CHANGED, _count)
+    monitor = LoopLagMonitor()
+    monitor.start()
+    await asyncio.sleep(seconds)
+    result = monitor.stop()
+    remove()
+    result["state_writes_per_s"] = round(writes / seconds, 2)
+    return result
+
+
+async def async_start_simulator(count: int, speed: float):
+    """Start the simulator and return the process and its robots."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        SIMULATOR,
+        "--count",
+        str(count),
+        "--speed",
+        str(speed),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line = await asyncio.wait_for(process.stdout.readline(), 60)
+    return process, json.loads(line)
+
+
+async def async_setup_hass(config_dir: str):
+    """Bootstrap Home Assistant with the integration as custom component."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import bootstrap
+    from homeassistant.runner import RuntimeConfig
+
+    os.makedirs(os.path.join(config_dir, "custom_components"))
+    os.symlink(
+        INTEGRATION_DIR, os.path.join(config_dir, "custom_components", DOMAIN)
+    )
+    with open(
+        os.path.join(config_dir, "configuration.yaml"), "w", encoding="utf-8"
+    ) as configuration:
+        configuration.write(CONFIGURATION)
+
+    hass = await bootstrap.async_setup_hass(
+        RuntimeConfig(config_dir=config_dir, skip_pip=True)
+    )
+    await hass.async_start()
+    return hass
+
+
+def create_entry(robot: dict):
+    """Return a config entry for a simulated robot."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import config_entries
+    from homeassistant.const import CONF_HOST, CONF_PASSWORD
+
+    options = {"continuous": True, "delay": 1}
+    return config_entries.ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title=robot["name"],
+        data={
+            CONF_HOST: robot["host"],
+            "blid": robot["blid"],
+            CONF_PASSWORD: robot["password"],
+            **options,
+        },
+        source=config_entries.SOURCE_USER,
+        options=options,
+        unique_id=robot["blid"],
+    )
+
+
+async def async_run_scenario(count: int, args) -> dict:
+    """Measure one robot count."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.config_entries import ConfigEntryState
+    from homeassistant.helpers import entity_registry as er
+
+    result: dict = {"robots": count}
+    simulator, robots = await async_start_simulator(count, args.speed)
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await async_setup_hass(config_dir)
+            gc.collect()
+            rss_before = rss_bytes()
+
+            entries = [create_entry(robot) for robot in robots]
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(hass.config_entries.async_add(entry) for entry in entries)
+            )
+            await hass.async_block_till_done()
+            result["setup_s"] = round(time.perf_counter() - started, 3)
+            result["loaded"] = sum(
+                entry.state is ConfigEntryState.LOADED for entry in entries
+            )
+
+            gc.collect()
+            result["memory_per_robot_kb"] = round(
+                (rss_bytes() - rss_before) / count / 1024, 1
+            )
+
+            result["docked"] = await async_measure_window(hass, args.idle)
+
+            registry = er.async_get(hass)
+            vacuums = [
+                entity.entity_id
+                for entity in registry.entities.values()
+                if entity.platform == DOMAIN and entity.domain == "vacuum"
+            ]
+            await hass.services.async_call(
+                "vacuum", "start", {"entity_id": vacuums}, blocking=True
+            )
+            result["cleaning"] = await async_measure_window(hass, args.duration)
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(hass.config_entries.async_unload(entry.entry_id) for entry in entries)
+            )
+            result["teardown_s"] = round(time.perf_counter() - started, 3)
+            await hass.async_stop()
+    finally:
+        simulator.terminate()
+        await simulator.wait()
+    return result
+
+
+def run_in_subprocess(count: int, args) -> dict:
+    """Measure one robot count in a fresh process."""
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--robots",
+        str(count),
+        "--duration",
+        str(args.duration),
+        "--idle",
+        str(args.idle),
+        "--speed",
+        str(args.speed),
+        "--json",
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def print_table(results: list[dict]):
+    """Print the results of all counts."""
+    columns = [
+        ("robots", lambda r: r["robots"]),
+        ("loaded", lambda r: r["loaded"]),
+        ("setup s", lambda r: r["setup_s"]),
+        ("teardown s", lambda r: r["teardown_s"]),
+        ("KB/robot", lambda r: r["memory_per_robot_kb"]),
+        ("docked writes/s", lambda r: r["docked"]["state_writes_per_s"]),
+        ("docked lag p99 ms", lambda r: r["docked"]["lag_p99_ms"]),
+        ("cleaning writes/s", lambda r: r["cleaning"]["state_writes_per_s"]),
+        ("cleaning lag p50 ms", lambda r: r["cleaning"]["lag_p50_ms"]),
+        ("cleaning lag p99 ms", lambda r: r["cleaning"]["lag_p99_ms"]),
+        ("cleaning lag max ms", lambda r: r["cleaning"]["lag_max_ms"]),
+    ]
+    widths = [len(name) for name, _ in columns]
+    print("  ".join(name for name, _ in columns))
+    for result in results:
+        print(
+            "  ".join(
+                str(value(result)).rjust(width)
+                for (_, value), width in zip(columns, widths)
+            )
+        )
+
+
+def main():
+    """Parse the arguments and run the scenarios."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--robots", default="1,10,50", help="comma separated robot counts"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="seconds to measure cleaning"
+    )
+    parser.add_argument(
+        "--idle", type=float, default=10, help="seconds to measure docked robots"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=30, help="simulated seconds per real second"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print the results as JSON"
+    )
+    args = parser.parse_args()
+    counts = [int(count) for count in args.robots.split(",")]
+
+    if len(counts) == 1:
+        results = [asyncio.run(async_run_scenario(counts[0], args))]
+    else:
+        results = [run_in_subprocess(count, args) for count in counts]
+
+    if args.json:
+        print(json.dumps(results if len(results) > 1 else results[0]))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""Simulate iRobot robots on local addresses.
+
+Every simulated robot listens on its own address, by default 127.0.1.1,
+127.0.1.2 and so on, and speaks the parts of the robot protocol used by the
+integration:
+
+- MQTT 3.1.1 over TLS on port 8883, with the BLID and password as credentials,
+  state messages on the shadow topic and commands on "cmd" and "delta",
+- the password request of the pairing mode on the same port,
+- the UDP discovery on port 5678.
+
+Missions run through the phases reported by real robots (run, stuck,
+hmPostMsn, evac, charge) and stream poses, battery, signal, bin and dock
+messages. Time can be accelerated so that a mission takes a few minutes.
+
+Linux routes all of 127.0.0.0/8 to the loopback interface, on other systems
+the addresses have to be added as aliases first.
+
+    python scripts/roomba_simulator.py --count 10 --speed 30
+
+The robots are printed as one JSON line once they listen, tools can read it
+to create matching config entries.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import math
+import os
+import random
+import ssl
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+_LOGGER = logging.getLogger("roomba_simulator")
+
+MQTT_PORT = 8883
+DISCOVERY_PORT = 5678
+SHADOW_TOPIC = "$aws/things/{}/shadow/update"
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+# Packet type of the password request, not part of MQTT
+PASSWORD_REQUEST = 15
+PASSWORD_MAGIC = bytes.fromhex("efcc3b2900")
+
+CONNACK_ACCEPTED = 0
+CONNACK_BAD_CREDENTIALS = 4
+
+# Real seconds between two simulation steps
+TICK = 1.0
+SIGNAL_INTERVAL = 10
+
+
+def create_tls_context(directory: str) -> ssl.SSLContext:
+    """Return a server context with a self-signed certificate."""
+    cert_path = os.path.join(directory, "robot.crt")
+    key_path = os.path.join(directory, "robot.key")
+    try:
+        _write_certificate_cryptography(cert_path, key_path)
+    except ImportError:
+        # Without cryptography, fall back to the openssl command
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+            + ["-days", "1", "-subj", "/CN=roomba"]
+            + ["-keyout", key_path, "-out", cert_path],
+            check=True,
+            capture_output=True,
+        )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+def _write_certificate_cryptography(cert_path: str, key_path: str):
+    """Write a self-signed certificate with the cryptography package."""
+    # pylint: disable=import-outside-toplevel
+    from datetime import datetime, timedelta
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "roomba")])
+    now = datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=5))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    with open(key_path, "wb") as key_file:
+        key_file.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            )
+        )
+    with open(cert_path, "wb") as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+
+
+def encode_packet(packet_type: int, body: bytes, flags: int = 0) -> bytes:
+    """Return an MQTT packet with its fixed header."""
+    header = bytearray([packet_type << 4 | flags])
+    length = len(body)
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(header) + body
+
+
+def encode_string(value: str | bytes) -> bytes:
+    """Return a length prefixed MQTT string."""
+    if isinstance(value, str):
+        value = value.encode()
+    return struct.pack("!H", len(value)) + value
+
+
+def decode_string(data: bytes, offset: int) -> tuple[bytes, int]:
+    """Return a length prefixed MQTT string and the offset after it."""
+    (length,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2 : offset + 2 + length], offset + 2 + length
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    """Return the type, flags and body of the next packet."""
+    first = (await reader.readexactly(1))[0]
+    length = 0
+    for shift in range(0, 28, 7):
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    return first >> 4, first & 0x0F, await reader.readexactly(length)
+
+
+class SimulatedRoomba:
+    """State and mission behavior of one robot."""
+
+    def __init__(self, index: int, address: str, speed: float, pmaps: int):
+        """Initialize the robot docked and charged."""
+        self.index = index
+        self.address = address
+        self.speed = speed
+        self.blid = f"{index:04d}" + "".join(random.choices("0123456789ABCDEF", k=12))
+        self.password = ":1:" + "".join(
+            random.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=16)
+        )
+        self.name = f"Simulated Roomba {index}"
+        self.mac = "50:14:79:%02x:%02x:%02x" % (
+            index >> 16 & 0xFF,
+            index >> 8 & 0xFF,
+            index & 0xFF,
+        )
+        self.pmap_ids = [
+            "".join(random.choices("abcdefghijklmnopqrstuvwxyz", k=22))
+            for _ in range(pmaps)
+        ]
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.stuck_probability = 0.0
+        self._path_step = 0
+        self._post_mission_ticks = 0
+        self._stuck_ticks = 0
+        self.state = {
+            "name": self.name,
+            "sku": "R981040",
+            "softwareVer": "v2.4.16-126",
+            "hwPartsRev": {"wlan0HwAddr": self.mac},
+            "cap": {
+                "pose": 1,
+                "carpetBoost": 1,
+                "binFullDetect": 1,
+                "pp": 1,
+                "maps": 3,
+                "pmaps": 4,
+            },
+            "batPct": 100,
+            "bin": {"present": True, "full": False},
+            "dock": {"known": True, "pn": "sim", "state": 301},
+            "cleanMissionStatus": {
+                "cycle": "none",
+                "phase": "charge",
+                "expireM": 0,
+                "rechrgM": 0,
+                "error": 0,
+                "notReady": 0,
+                "mssnM": 0,
+                "sqft": 0,
+                "initiator": "none",
+                "nMssn": 0,
+                "mssnStrtTm": 0,
+            },
+            "pose": {"theta": 0, "point": {"x": 0, "y": 0}},
+            "signal": {"rssi": -45, "snr": 40, "noise": -85},
+            "bbrun": {
+                "hr": 0,
+                "min": 0,
+                "sqft": 0,
+                "nMssn": 0,
+                "nScrubs": 0,
+                "nEvacs": 0,
+                "nStuck": 0,
+            },
+            "lastCommand": {"command": None, "time": None, "initiator": None},
+            "pmaps": [{pmap_id: "210101T000000"} for pmap_id in self.pmap_ids],
+            "vacHigh": False,
+            "carpetBoost": True,
+            "openOnly": False,
+            "twoPass": False,
+            "noAutoPasses": False,
+        }
+        # Fractional values, the robot reports whole numbers
+        self._battery = 100.0
+        self._minutes = 0.0
+        self._bin_fill = 0.0
+
+    @property
+    def mission(self) -> dict:
+        """Return the clean mission status."""
+        return self.state["cleanMissionStatus"]
+
+    def discovery_response(self) -> bytes:
+        """Return the answer to a discovery request."""
+        return json.dumps(
+            {
+                "ver": "3",
+                "hostname": f"Roomba-{self.blid}",
+                "robotname": self.name,
+                "ip": self.address,
+                "mac": self.mac,
+                "sw": self.state["softwareVer"],
+                "sku": self.state["sku"],
+                "nc": 0,
+                "proto": "mqtt",
+                "cap": self.state["cap"],
+            }
+        ).encode()
+
+    def info(self) -> dict:
+        """Return what a config entry needs to connect."""
+        return {
+            "host": self.address,
+            "blid": self.blid,
+            "password": self.password,
+            "name": self.name,
+        }
+
+    def report(self, *keys: str):
+        """Send parts of the state to all connected clients."""
+        self.publish({key: self.state[key] for key in keys})
+
+    def publish(self, reported: dict):
+        """Send a reported state delta to all connected clients."""
+        payload = json.dumps({"state": {"reported": reported}}).encode()
+        packet = encode_packet(
+            PUBLISH, encode_string(SHADOW_TOPIC.format(self.blid)) + payload
+        )
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+                continue
+            writer.write(packet)
+
+    def report_full_state(self, writer: asyncio.StreamWriter):
+        """Send the whole state in chunks like a robot after connecting."""
+        keys = list(self.state)
+        for start in range(0, len(keys), 5):
+            reported = {key: self.state[key] for key in keys[start : start + 5]}
+            payload = json.dumps({"state": {"reported": reported}}).encode()
+            writer.write(
+                encode_packet(
+                    PUBLISH, encode_string(SHADOW_TOPIC.format(self.blid)) + payload
+                )
+            )
+
+    def handle_command(self, command: str, params: dict):
+        """Apply a command sent on the cmd topic."""
+        mission = self.mission
+        self.state["lastCommand"] = {
+            "command": command,
+            "time": int(time.time()),
+            "initiator": params.get("initiator", "localApp"),
+            **{
+                key: value
+                for key, value in params.items()
+                if key in ("pmap_id", "regions", "ordered", "user_pmapv_id")
+            },
+        }
+        if command in ("start", "clean") and mission["cycle"] == "none":
+            mission.update(
+                cycle="clean",
+                phase="run",
+                initiator="localApp",
+                mssnM=0,
+                sqft=0,
+                error=0,
+                mssnStrtTm=int(time.time()),
+            )
+            self._minutes = 0.0
+            self._path_step = 0
+        elif command == "pause" and mission["phase"] == "run":
+            mission["phase"] = "stop"
+        elif command == "resume" and mission["phase"] == "stop":
+            mission["phase"] = "run"
+        elif command == "stop":
+            mission.update(cycle="none", phase="stop")
+        elif command == "dock":
+            mission.update(cycle="dock", phase="hmUsrDock")
+            self._post_mission_ticks = 3
+        self.report("lastCommand", "cleanMissionStatus")
+
+    def handle_delta(self, state: dict):
+        """Apply preferences sent on the delta topic."""
+        self.state.update(state)
+        self.publish(state)
+
+    def step(self):
+        """Advance the simulation by one tick."""
+        mission = self.mission
+        minutes = TICK * self.speed / 60
+        phase = mission["phase"]
+
+        if phase == "run":
+            self._move()
+            self._battery = max(0.0, self._battery - 0.3 * minutes)
+            self._minutes += minutes
+            self.state["batPct"] = round(self._battery)
+            mission["mssnM"] = int(self._minutes)
+            mission["sqft"] = int(12 * self._minutes)
+            self._bin_fill += 0.02 * minutes
+            if random.random() < 0.05:
+                self.state["bbrun"]["nScrubs"] += 1
+                self.report("bbrun")
+            if random.random() < self.stuck_probability:
+                mission.update(phase="stuck", error=1)
+                self.state["bbrun"]["nStuck"] += 1
+                self._stuck_ticks = 5
+            elif mission["mssnM"] >= 60 or self.state["batPct"] < 15:
+                mission["phase"] = "hmPostMsn"
+                self._post_mission_ticks = 5
+            if self._bin_fill >= 1 and not self.state["bin"]["full"]:
+                self.state["bin"]["full"] = True
+                self.report("bin")
+            self.report("pose", "batPct")
+            self.report("cleanMissionStatus")
+        elif phase == "stuck":
+            self._stuck_ticks -= 1
+            if self._stuck_ticks <= 0:
+                mission.update(phase="run", error=0)
+                self.report("cleanMissionStatus")
+        elif phase in ("hmPostMsn", "hmUsrDock"):
+            self._move_home()
+            self._post_mission_ticks -= 1
+            if self._post_mission_ticks <= 0:
+                self._finish_mission()
+            self.report("pose", "cleanMissionStatus")
+        elif phase == "evac":
+            self._bin_fill = 0
+            self.state["bin"]["full"] = False
+            self.state["bbrun"]["nEvacs"] += 1
+            mission.update(cycle="none", phase="charge")
+            self.report("bin", "bbrun", "cleanMissionStatus")
+        elif phase == "charge" and self._battery < 100:
+            self._battery = min(100.0, self._battery + 2 * minutes)
+            if round(self._battery) != self.state["batPct"]:
+                self.state["batPct"] = round(self._battery)
+                self.report("batPct")
+
+    def _finish_mission(self):
+        """Dock, empty the bin if it is full and count the mission."""
+        mission = self.mission
+        bbrun = self.state["bbrun"]
+        if mission["cycle"] == "clean":
+            bbrun["nMssn"] += 1
+            mission["nMssn"] += 1
+            total_minutes = bbrun["hr"] * 60 + bbrun["min"] + mission["mssnM"]
+            bbrun.update(hr=total_minutes // 60, min=total_minutes % 60)
+            bbrun["sqft"] += mission["sqft"]
+        if self.state["bin"]["full"]:
+            mission.update(cycle="evac", phase="evac")
+        else:
+            mission.update(cycle="none", phase="charge")
+        self.state["pose"] = {"theta": 0, "point": {"x": 0, "y": 0}}
+        self.report("bbrun")
+
+    def _move(self):
+        """Follow rows across a 8 by 6 meter room."""
+        self._path_step += 1
+        row, column = divmod(self._path_step, 40)
+        x = column * 20 if row % 2 == 0 else 800 - column * 20
+        self.state["pose"] = {
+            "theta": 0 if row % 2 == 0 else 180,
+            "point": {"x": x - 400, "y": (row * 25) % 600 - 300},
+        }
+
+    def _move_home(self):
+        """Halve the distance to the dock."""
+        point = self.state["pose"]["point"]
+        x, y = point["x"] // 2, point["y"] // 2
+        self.state["pose"] = {
+            "theta": int(math.degrees(math.atan2(-y, -x))) if x or y else 0,
+            "point": {"x": x, "y": y},
+        }
+
+    def signal(self):
+        """Report a fluctuating signal."""
+        self.state["signal"] = {
+            "rssi": random.randint(-60, -40),
+            "snr": random.randint(25, 45),
+            "noise": -85,
+        }
+        self.report("signal")
+
+
+class RobotServer:
+    """The network side of a simulated robot."""
+
+    def __init__(self, robot: SimulatedRoomba, context: ssl.SSLContext, pairing: bool):
+        """Initialize the server."""
+        self.robot = robot
+        self.context = context
+        self.pairing = pairing
+        self._servers: list = []
+
+    async def async_start(self):
+        """Listen for MQTT, password and discovery requests."""
+        loop = asyncio.get_running_loop()
+        self._servers.append(
+            await asyncio.start_server(
+                self._async_handle_client,
+                self.robot.address,
+                MQTT_PORT,
+                ssl=self.context,
+            )
+        )
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: DiscoveryProtocol(self.robot),
+                local_addr=(self.robot.address, DISCOVERY_PORT),
+            )
+            self._servers.append(transport)
+        except OSError as err:
+            _LOGGER.warning("No discovery on %s: %s", self.robot.address, err)
+
+    def close(self):
+        """Stop listening."""
+        for server in self._servers:
+            server.close()
+
+    async def _async_handle_client(self, reader, writer):
+        """Serve one client connection."""
+        robot = self.robot
+        try:
+            packet_type, _, body = await read_packet(reader)
+            if packet_type == PASSWORD_REQUEST:
+                await self._async_answer_password(body, writer)
+                return
+            if packet_type != CONNECT or not self._authenticate(body):
+                writer.write(encode_packet(CONNACK, bytes([0, CONNACK_BAD_CREDENTIALS])))
+                await writer.drain()
+                return
+            writer.write(encode_packet(CONNACK, bytes([0, CONNACK_ACCEPTED])))
+            robot.clients.add(writer)
+            robot.report_full_state(writer)
+            while True:
+                packet_type, flags, body = await read_packet(reader)
+                if packet_type == DISCONNECT:
+                    return
+                self._handle_packet(packet_type, flags, body, writer)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            robot.clients.discard(writer)
+            writer.close()
+
+    async def _async_answer_password(self, body: bytes, writer):
+        """Send the password while in pairing mode."""
+        if self.pairing and body == PASSWORD_MAGIC:
+            payload = PASSWORD_MAGIC + self.robot.password.encode() + b"\x00"
+            writer.write(bytes([PASSWORD_REQUEST << 4, len(payload)]) + payload)
+            await writer.drain()
+
+    def _authenticate(self, body: bytes) -> bool:
+        """Check the credentials of a CONNECT packet."""
+        _, offset = decode_string(body, 0)  # protocol name
+        connect_flags = body[offset + 1]
+        offset += 4  # level, flags and keep alive
+        _, offset = decode_string(body, offset)  # client id
+        if connect_flags & 0x04:  # will topic and message
+            _, offset = decode_string(body, offset)
+            _, offset = decode_string(body, offset)
+        username = password = b""
+        if connect_flags & 0x80:
+            username, offset = decode_string(body, offset)
+        if connect_flags & 0x40:
+            password, offset = decode_string(body, offset)
+        return (
+            username.decode() == self.robot.blid
+            and password.decode() == self.robot.password
+        )
+
+    def _handle_packet(self, packet_type, flags, body, writer):
+        """Answer a packet of a connected client."""
+        if packet_type == PINGREQ:
+            writer.write(encode_packet(PINGRESP, b""))
+        elif packet_type == SUBSCRIBE:
+            packet_id = body[:2]
+            granted, offset = bytearray(), 2
+            while offset < len(body):
+                _, offset = decode_string(body, offset)
+                offset += 1
+                granted.append(0)
+            writer.write(encode_packet(SUBACK, packet_id + bytes(granted)))
+        elif packet_type == UNSUBSCRIBE:
+            writer.write(encode_packet(UNSUBACK, body[:2]))
+        elif packet_type == PUBLISH:
+            topic, offset = decode_string(body, 0)
+            qos = flags >> 1 & 0x03
+            if qos:
+                writer.write(encode_packet(PUBACK, body[offset : offset + 2]))
+                offset += 2
+            self._handle_publish(topic.decode(), body[offset:])
+
+    def _handle_publish(self, topic: str, payload: bytes):
+        """Apply a command or preference from a client."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if topic == "cmd":
+            self.robot.handle_command(message.get("command"), message)
+        elif topic == "delta":
+            self.robot.handle_delta(message.get("state", {}))
+
+
+class DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Answer discovery requests."""
+
+    def __init__(self, robot: SimulatedRoomba):
+        """Initialize the protocol."""
+        self.robot = robot
+        self.transport = None
+
+    def connection_made(self, transport):
+        """Keep the transport to answer."""
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        """Answer a discovery request."""
+        if data == b"irobotmcs":
+            self.transport.sendto(self.robot.discovery_response(), addr)
+
+
+async def async_run_robot(robot: SimulatedRoomba):
+    """Advance the robot and report its signal periodically."""
+    next_signal = time.monotonic() + SIGNAL_INTERVAL
+    # Spread the ticks of many robots over the interval
+    await asyncio.sleep(random.random() * TICK)
+    while True:
+        robot.step()
+        if time.monotonic() >= next_signal:
+            robot.signal()
+            next_signal += SIGNAL_INTERVAL
+        await asyncio.sleep(TICK)
+
+
+async def async_main(args):
+    """Start the robots and run until interrupted."""
+    base = ipaddress.ip_address(args.base_address)
+    with tempfile.TemporaryDirectory() as directory:
+        context = create_tls_context(directory)
+        servers = []
+        for index in range(args.count):
+            robot = SimulatedRoomba(
+                index + 1, str(base + index), args.speed, args.pmaps
+            )
+            robot.stuck_probability = args.stuck_probability
+            server = RobotServer(robot, context, args.pairing)
+            await server.async_start()
+            servers.append(server)
+
+        tasks = [
+            asyncio.create_task(async_run_robot(server.robot)) for server in servers
+        ]
+        print(json.dumps([server.robot.info() for server in servers]), flush=True)
+        _LOGGER.info("%d robots listening from %s", len(servers), base)
+        if args.autostart is not None:
+            await asyncio.sleep(args.autostart)
+            for server in servers:
+                server.robot.handle_command("start", {"initiator": "schedule"})
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for server in servers:
+                server.close()
+
+
+def main():
+    """Parse the arguments and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=1, help="number of robots")
+    parser.add_argument(
+        "--base-address", default="127.0.1.1", help="address of the first robot"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1, help="simulated seconds per real second"
+    )
+    parser.add_argument("--pmaps", type=int, default=1, help="maps per robot")
+    parser.add_argument(
+        "--pairing", action="store_true", help="answer password requests"
+    )
+    parser.add_argument(
+        "--stuck-probability",
+        type=float,
+        default=0.0,
+        help="chance per tick that a cleaning robot gets stuck",
+    )
+    parser.add_argument(
+        "--autostart",
+        type=float,
+        metavar="SECONDS",
+        help="start a mission on all robots after this delay",
+    )
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO, stream=sys.stderr
+    )
+    try:
+        asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for the iRobot Roomba integration."""
@@ -0,0 +1,52 @@
+"""Helpers for the Roomba tests."""
+from __future__ import annotations
+
+from typing import Any
+
+from custom_components.roomba.state_monitor import RoombaStateMonitor
+
+
+class FakeRoomba:
+    """The parts of a roombapy robot the integration reads and calls."""
+
+    def __init__(self, reported: dict[str, Any] | None = None):
+        """Initialize the robot with a reported state."""
+        self.master_state = {"state": {"reported": reported or {}}}
+        self.current_pmap_id: str | None = None
+        self.sent: list[tuple[str, Any]] = []
+        self.published: list[tuple[str, str]] = []
+        self.remote_client = self
+
+    @property
+    def reported(self) -> dict[str, Any]:
+        """Return the reported state."""
+        return self.master_state["state"]["reported"]
+
+    def register_on_message_callback(self, callback):
+        """Messages are pushed by the tests, see push_state."""
+
+    def send_command(self, command: str, params=None):
+        """Record a command."""
+        self.sent.append((command, params))
+
+    def publish(self, topic: str, payload: str):
+        """Record a published message."""
+        self.published.append((topic, payload))
+
+
+def push_state(monitor: RoombaStateMonitor, delta: dict[str, Any]):
+    """Merge a message into the reported state and hand it to the monitor."""
+    monitor.roomba.reported.update(delta)
+    monitor._async_handle_message(  # pylint: disable=protected-access
+        {"state": {"reported": delta}}
+    )
+
+
+def mission_status(cycle: str = "none", phase: str = "charge", **kwargs) -> dict:
+    """Return a cleanMissionStatus message."""
+    return {"cleanMissionStatus": {"cycle": cycle, "phase": phase, **kwargs}}
+
+
+def pose(x: int, y: int, theta: int = 0) -> dict:
+    """Return a pose message."""
+    return {"pose": {"point": {"x": x, "y": y}, "theta": theta}}
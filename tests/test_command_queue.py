@@ -0,0 +1,128 @@
+"""Tests for coalescing and acknowledging commands."""
+import asyncio
+import json
+
+import async_timeout
+
+from custom_components.roomba import command_queue
+from custom_components.roomba.command_queue import RoombaCommandQueue
+from custom_components.roomba.state_monitor import RoombaStateMonitor
+
+from .common import FakeRoomba, mission_status, push_state
+
+
+class FakeSession:
+    """A session that is always connected."""
+
+    async def async_ensure_connected(self):
+        """Connect to the robot."""
+
+
+def _queue(hass, reported=None):
+    roomba = FakeRoomba(reported or mission_status())
+    monitor = RoombaStateMonitor(hass, roomba)
+    return RoombaCommandQueue(hass, roomba, monitor, FakeSession()), roomba
+
+
+async def _async_wait_sent(roomba, count):
+    """Wait until count commands reached the robot."""
+    async with async_timeout.timeout(1):
+        while len(roomba.sent) < count:
+            await asyncio.sleep(0.01)
+
+
+async def test_mission_commands_superseded(hass):
+    """Mission commands that were not sent yet are replaced by newer ones."""
+    queue, roomba = _queue(hass)
+    calls = [
+        hass.async_create_task(queue.async_send_command(command))
+        for command in ("start", "pause", "dock")
+    ]
+    await _async_wait_sent(roomba, 1)
+    push_state(queue.monitor, mission_status("dock", "hmUsrDock"))
+
+    assert await asyncio.wait_for(asyncio.gather(*calls), 1) == [True, True, True]
+    assert roomba.sent == [("dock", None)]
+
+
+async def test_other_commands_kept(hass):
+    """Commands other than mission commands are all sent, in order."""
+    queue, roomba = _queue(hass)
+    calls = [
+        hass.async_create_task(queue.async_send_command(command))
+        for command in ("find", "start", "find")
+    ]
+    await _async_wait_sent(roomba, 3)
+    push_state(queue.monitor, mission_status("clean", "run"))
+
+    assert await asyncio.wait_for(asyncio.gather(*calls), 1) == [True, True, True]
+    assert [command for command, _ in roomba.sent] == ["find", "start", "find"]
+
+
+async def test_preferences_merged(hass):
+    """Preference writes queued together are published as one delta."""
+    queue, roomba = _queue(hass)
+    writes = ({"binPause": True}, {"openOnly": False}, {"binPause": False})
+    calls = [
+        hass.async_create_task(queue.async_set_preferences(preferences))
+        for preferences in writes
+    ]
+    async with async_timeout.timeout(1):
+        while not roomba.published:
+            await asyncio.sleep(0.01)
+    push_state(queue.monitor, {"binPause": False, "openOnly": False})
+
+    assert await asyncio.wait_for(asyncio.gather(*calls), 1) == [True, True, True]
+    assert len(roomba.published) == 1
+    topic, payload = roomba.published[0]
+    assert topic == "delta"
+    assert json.loads(payload) == {"state": {"binPause": False, "openOnly": False}}
+
+
+async def test_acknowledged_by_new_last_command(hass):
+    """A report of the command that differs from the previous one acknowledges it.
+
+    The robot stamps lastCommand with its own clock, which may lag behind.
+    """
+    stale = {"command": "start", "time": 1700000000, "initiator": "localApp"}
+    queue, roomba = _queue(hass, {**mission_status(), "lastCommand": stale})
+    call = hass.async_create_task(queue.async_send_command("start"))
+    await _async_wait_sent(roomba, 1)
+
+    push_state(queue.monitor, {"lastCommand": stale})
+    await asyncio.sleep(0.05)
+    assert not call.done()
+
+    push_state(queue.monitor, {"lastCommand": {**stale, "time": 1699999990}})
+    assert await asyncio.wait_for(call, 1)
+
+
+async def test_find_resolves_when_published(hass):
+    """Commands the reported state does not reflect resolve once sent."""
+    queue, roomba = _queue(hass)
+
+    assert await asyncio.wait_for(queue.async_send_command("find"), 1)
+    assert roomba.sent == [("find", None)]
+    assert queue.latency.as_dict()["find"]["timeouts"] == 0
+
+
+async def test_unacknowledged(hass, monkeypatch):
+    """Mission commands the robot does not act on resolve with False."""
+    monkeypatch.setattr(command_queue, "ACK_TIMEOUT", 0.05)
+    queue, _ = _queue(hass)
+
+    assert not await asyncio.wait_for(queue.async_send_command("start"), 1)
+    assert queue.latency.as_dict()["start"]["timeouts"] == 1
+
+
+async def test_shutdown_releases_waiters(hass):
+    """Callers still waiting for the robot are released on shutdown."""
+    queue, roomba = _queue(hass)
+    connected = asyncio.Event()
+    queue.session.async_ensure_connected = connected.wait
+    call = hass.async_create_task(queue.async_send_command("start"))
+    await asyncio.sleep(0.01)
+
+    await queue.async_shutdown()
+    assert await asyncio.wait_for(call, 1) is False
+    assert roomba.sent == []
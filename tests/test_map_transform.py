@@ -0,0 +1,79 @@
+"""Tests for placing reported poses on a map."""
+import random
+
+import pytest
+from roombapy.mapping.math_helpers import interpolate, rotate
+
+from custom_components.roomba.map_transform import MapTransform
+
+
+def _roombapy_position(x, y, min_coords, max_coords, angle, size):
+    """Place a reported point the way the roombapy mapper does."""
+    # The mapper works on co_ords, which swaps the reported x and y
+    x, y = rotate(
+        y,
+        x,
+        angle,
+        invert_x=min_coords[0] > max_coords[0],
+        invert_y=min_coords[1] < max_coords[1],
+    )
+    return (
+        interpolate(x, [min_coords[0], max_coords[0]], [0, size[0] - 1]),
+        interpolate(y, [min_coords[1], max_coords[1]], [0, size[1] - 1]),
+    )
+
+
+def _random_bounds(rng):
+    """Return distinct bounds, mirrored on either axis at random."""
+    low_x, high_x = sorted(rng.sample(range(-1500, 1500), 2))
+    low_y, high_y = sorted(rng.sample(range(-1500, 1500), 2))
+    if rng.random() < 0.5:
+        low_x, high_x = high_x, low_x
+    if rng.random() < 0.5:
+        low_y, high_y = high_y, low_y
+    return (low_x, low_y), (high_x, high_y)
+
+
+def test_matches_roombapy():
+    """The matrix places points like roombapy rotates and interpolates them."""
+    rng = random.Random(42)
+    for _ in range(40):
+        min_coords, max_coords = _random_bounds(rng)
+        angle = rng.choice([0, 90, 180, 270, rng.uniform(0, 360)])
+        size = (rng.randint(200, 1200), rng.randint(200, 1200))
+        transform = MapTransform(min_coords, max_coords, angle, size)
+        points = [
+            [rng.uniform(-2000, 2000), rng.uniform(-2000, 2000)] for _ in range(20)
+        ]
+
+        path = transform.to_image_path(points).tolist()
+        for (x, y), placed in zip(points, path):
+            expected = _roombapy_position(x, y, min_coords, max_coords, angle, size)
+            assert transform.to_image(x, y) == pytest.approx(expected, abs=1e-6)
+            assert placed == pytest.approx(expected, abs=1e-6)
+
+
+def test_clamps_to_the_image():
+    """Points outside of the bounds end up on the border of the image."""
+    transform = MapTransform(size=(640, 480))
+
+    assert transform.limits == (639, 479)
+    assert transform.to_image(5000, 5000) == (639, 479)
+    assert transform.to_image(-5000, -5000) == (0, 0)
+
+
+def test_empty_path():
+    """An empty path is an empty n x 2 array."""
+    assert MapTransform().to_image_path([]).shape == (0, 2)
+
+
+def test_prepared_on_first_path():
+    """NumPy is only needed once a path is placed."""
+    transform = MapTransform()
+    assert not transform.prepared
+
+    transform.to_image(0, 0)
+    assert not transform.prepared
+
+    transform.to_image_path([[0, 0]])
+    assert transform.prepared
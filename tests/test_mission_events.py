@@ -0,0 +1,118 @@
+"""Tests for the mission lifecycle events."""
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.roomba.mission_events import (
+    EVENT_BIN_FULL,
+    EVENT_DOCKED,
+    EVENT_EVAC_STARTED,
+    EVENT_MISSION_COMPLETED,
+    EVENT_MISSION_STARTED,
+    EVENT_NOT_READY,
+    EVENT_STUCK,
+    MissionEvents,
+    MissionFlags,
+)
+from custom_components.roomba.state_monitor import RoombaStateMonitor
+
+from .common import FakeRoomba, mission_status, pose, push_state
+
+EVENTS = (
+    EVENT_MISSION_STARTED,
+    EVENT_MISSION_COMPLETED,
+    EVENT_STUCK,
+    EVENT_BIN_FULL,
+    EVENT_DOCKED,
+    EVENT_EVAC_STARTED,
+    EVENT_NOT_READY,
+)
+
+
+def test_flags_from_state():
+    """Flags are derived from the mission and bin state."""
+    flags = MissionFlags.from_state(
+        {**mission_status("clean", "stuck", notReady=15), "bin": {"full": True}}
+    )
+
+    assert flags == MissionFlags(
+        running=True, stuck=True, docked=False, evac=False, bin_full=True, not_ready=15
+    )
+    assert MissionFlags.from_state({}) == MissionFlags(
+        running=False,
+        stuck=False,
+        docked=False,
+        evac=False,
+        bin_full=False,
+        not_ready=0,
+    )
+
+
+def test_emptying_the_bin_is_docked():
+    """The robot stays docked while the dock empties its bin."""
+    assert MissionFlags.from_state(mission_status("evac", "evac")).docked
+    assert MissionFlags.from_state(mission_status("none", "charge")).docked
+    assert not MissionFlags.from_state(mission_status("clean", "hmPostMsn")).docked
+
+
+async def _async_setup(hass, reported):
+    monitor = RoombaStateMonitor(hass, FakeRoomba(reported))
+    events = {
+        event_type: async_capture_events(hass, event_type) for event_type in EVENTS
+    }
+    return MissionEvents(hass, "BLID", monitor), monitor, events
+
+
+def _fired(events):
+    return {event_type: len(captured) for event_type, captured in events.items()}
+
+
+async def test_mission_with_auto_empty(hass):
+    """A mission ending at an auto-empty dock fires one event per transition."""
+    mission_events, monitor, events = await _async_setup(hass, mission_status())
+
+    for cycle, phase in (
+        ("clean", "run"),
+        ("clean", "run"),
+        ("clean", "hmPostMsn"),
+        ("none", "charge"),
+        ("evac", "evac"),
+        ("none", "charge"),
+    ):
+        push_state(monitor, mission_status(cycle, phase))
+    await hass.async_block_till_done()
+
+    assert _fired(events) == {
+        EVENT_MISSION_STARTED: 1,
+        EVENT_MISSION_COMPLETED: 1,
+        EVENT_STUCK: 0,
+        EVENT_BIN_FULL: 0,
+        EVENT_DOCKED: 1,
+        EVENT_EVAC_STARTED: 1,
+        EVENT_NOT_READY: 0,
+    }
+    assert events[EVENT_DOCKED][0].data["blid"] == "BLID"
+    mission_events.async_shutdown()
+
+
+async def test_repeated_states_fire_once(hass):
+    """Repeated messages and unrelated updates fire nothing new."""
+    mission_events, monitor, events = await _async_setup(hass, mission_status())
+
+    push_state(monitor, mission_status("clean", "stuck"))
+    push_state(monitor, pose(10, 10))
+    push_state(monitor, mission_status("clean", "stuck"))
+    push_state(monitor, {"bin": {"full": True}})
+    push_state(monitor, {"bin": {"full": True}})
+    push_state(monitor, mission_status("clean", "stop", notReady=16))
+    push_state(monitor, mission_status("clean", "stop", notReady=16))
+    await hass.async_block_till_done()
+
+    assert _fired(events) == {
+        EVENT_MISSION_STARTED: 1,
+        EVENT_MISSION_COMPLETED: 0,
+        EVENT_STUCK: 1,
+        EVENT_BIN_FULL: 1,
+        EVENT_DOCKED: 0,
+        EVENT_EVAC_STARTED: 0,
+        EVENT_NOT_READY: 1,
+    }
+    mission_events.async_shutdown()
@@ -0,0 +1,94 @@
+"""Tests for the simplified mission path and its deltas."""
+from custom_components.roomba import path_tracker
+from custom_components.roomba.path_tracker import PathTracker
+from custom_components.roomba.state_monitor import RoombaStateMonitor
+
+from .common import FakeRoomba, mission_status, pose, push_state
+
+
+def _tracker(reported=None):
+    monitor = RoombaStateMonitor(None, FakeRoomba(reported or mission_status()))
+    return PathTracker(None, "BLID", monitor), monitor
+
+
+def _start_mission(monitor, start=1700000000):
+    push_state(monitor, mission_status("clean", "run", mssnStrtTm=start))
+
+
+def test_simplified_path():
+    """Short moves are dropped, straight moves extend the last segment."""
+    tracker, monitor = _tracker()
+    _start_mission(monitor)
+    for x, y in ((0, 0), (2, 1), (100, 0), (200, 0), (200, 100)):
+        push_state(monitor, pose(x, y))
+
+    assert tracker.mission == "1700000000"
+    assert tracker.path == [[0, 0], [200, 0], [200, 100]]
+    assert tracker.pose == [200, 100, 0]
+
+
+def test_poses_while_docked():
+    """Poses outside of a mission move the robot, not the path."""
+    tracker, monitor = _tracker()
+    push_state(monitor, pose(50, 50))
+
+    assert tracker.path == []
+    assert tracker.pose == [50, 50, 0]
+
+
+def test_new_mission_resets_path():
+    """Every mission starts a new path."""
+    tracker, monitor = _tracker()
+    _start_mission(monitor)
+    push_state(monitor, pose(0, 0))
+    push_state(monitor, pose(100, 0))
+    push_state(monitor, mission_status("none", "charge"))
+    _start_mission(monitor, 1700009999)
+
+    assert tracker.path == []
+    assert tracker.mission == "1700009999"
+
+
+def test_deltas_since():
+    """Subscribers resume from the last sequence number they received."""
+    tracker, monitor = _tracker()
+    _start_mission(monitor)
+    snapshot = tracker.snapshot()
+    received = []
+    tracker.async_subscribe(received.append)
+    push_state(monitor, pose(0, 0))
+    push_state(monitor, pose(100, 0))
+    push_state(monitor, pose(200, 0))
+
+    deltas = tracker.deltas_since(snapshot["seq"], snapshot["mission"])
+    assert deltas == received
+    assert [delta.get("path") for delta in deltas] == ["append", "append", "replace"]
+    assert [delta["seq"] for delta in deltas] == [
+        snapshot["seq"] + 1,
+        snapshot["seq"] + 2,
+        snapshot["seq"] + 3,
+    ]
+    assert tracker.deltas_since(tracker.seq, tracker.mission) == []
+
+
+def test_deltas_since_unknown():
+    """Sequence numbers that cannot be resumed from ask for a snapshot."""
+    tracker, monitor = _tracker()
+    _start_mission(monitor)
+    push_state(monitor, pose(0, 0))
+
+    assert tracker.deltas_since(tracker.seq, "another mission") is None
+    assert tracker.deltas_since(tracker.seq + 1, tracker.mission) is None
+
+
+def test_deltas_since_dropped(monkeypatch):
+    """Deltas that left the buffer cannot be resumed from."""
+    monkeypatch.setattr(path_tracker, "DELTA_BUFFER", 3)
+    tracker, monitor = _tracker()
+    _start_mission(monitor)
+    seq = tracker.seq
+    for x in range(0, 500, 100):
+        push_state(monitor, pose(x, 0))
+
+    assert tracker.deltas_since(seq, tracker.mission) is None
+    assert len(tracker.deltas_since(tracker.seq - 3, tracker.mission)) == 3
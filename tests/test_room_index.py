@@ -0,0 +1,72 @@
+"""Tests for locating the robot in the room polygons of a map."""
+from custom_components.roomba.room_index import Room, RoomIndex, build_room_indexes
+
+# An L shaped living room around a square kitchen, sharing the x = 300 edge
+LIVING_ROOM = {
+    "region_id": "1",
+    "name": "Living room",
+    "points": [[0, 0], [300, 0], [300, 200], [500, 200], [500, 400], [0, 400]],
+}
+KITCHEN = {"region_id": "2", "points": [[300, 0], [500, 0], [500, 200], [300, 200]]}
+HALLWAY = {
+    "region_id": "zid-3",
+    "type": "zid",
+    "points": [[-250, -50], [-50, -50], [-50, 50], [-250, 50]],
+}
+
+
+def _index(cell=100):
+    return RoomIndex(
+        [Room.from_config(conf) for conf in (LIVING_ROOM, KITCHEN, HALLWAY)], cell
+    )
+
+
+def test_room_from_config():
+    """Rooms are keyed like regions and know their bounds."""
+    room = Room.from_config(LIVING_ROOM)
+
+    assert room.key == "rid:1"
+    assert room.name == "Living room"
+    assert room.bounds == (0, 0, 500, 400)
+    assert Room.from_config(HALLWAY).key == "zid:zid-3"
+
+
+def test_locate():
+    """Points are found in the polygon containing them, not its bounds."""
+    index = _index()
+
+    assert index.locate(100, 100).region_id == "1"
+    assert index.locate(400, 300).region_id == "1"
+    assert index.locate(400, 100).region_id == "2"
+    assert index.locate(-100, 0).region_id == "zid-3"
+
+
+def test_locate_outside():
+    """Points outside of all rooms are in no room."""
+    index = _index()
+
+    assert index.locate(-100, 300) is None
+    assert index.locate(600, 100) is None
+    assert index.locate(10_000, 10_000) is None
+
+
+def test_cell_size_does_not_change_results():
+    """Bucketing only narrows down the polygons that are tested."""
+    small, large = _index(cell=25), _index(cell=1000)
+    for x in range(-300, 600, 20):
+        for y in range(-100, 450, 20):
+            assert small.locate(x, y) == large.locate(x, y)
+
+
+def test_build_room_indexes():
+    """Only maps with rooms get an index."""
+    indexes = build_room_indexes(
+        [
+            {"pmap_id": "pmap1", "rooms": [LIVING_ROOM, KITCHEN]},
+            {"pmap_id": "pmap2"},
+        ]
+    )
+
+    assert list(indexes) == ["pmap1"]
+    assert len(indexes["pmap1"].rooms) == 2
+    assert build_room_indexes(None) == {}